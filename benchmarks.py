@@ -0,0 +1,223 @@
+# Timing of the methods used to check equivalence of configs, and of importing modules and starting worker processes
+# Run with 'python benchmarks.py' (synthetic spinel cells) or 'python benchmarks.py path/to/POSCAR_orig'
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import multiprocessing as mp
+import numpy as np
+import ase
+import ase.io
+from ase import Atoms
+from ase.spacegroup import crystal
+# Ensuring correct version of spglib is imported
+try:
+    import spglib as spg
+except ImportError:
+    from pyspglib import spglib as spg
+import config_equivalence as ce
+import misc_tools as mt
+import perm_kernels as pk
+
+
+HEAVY_MODULES = ('ase', 'ase.io', 'spglib', 'pandas', 'scipy', 'matplotlib', 'IPython', 'numba') # Modules that worker processes should not need
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Run in a fresh interpreter: import a module and report the time taken and which heavy modules were loaded
+_IMPORT_CODE = '''
+import sys, time
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter()-t0)
+print(','.join(name for name in {heavy} if name in sys.modules))
+'''
+
+# Run in a fresh interpreter: start a pool with the given start method and time until every worker has run one task on a shared config
+_POOL_START_CODE = '''
+import sys, time
+import multiprocessing as mp
+from functools import partial
+import numpy as np
+import degen_core as dc
+import shared_state as ss
+if __name__ == '__main__':
+    start_method, num_proc = sys.argv[1], int(sys.argv[2])
+    ss.install_cleanup_handlers()
+    sub_atoms = np.array([27]*4 + [25]*4 + [27]*8 + [25]*8, dtype=np.uint8)
+    shared_arrays = {'sub_atoms': sub_atoms, 'sublattice_bounds': np.array([0, 8, 24]), 'orig_images': sub_atoms[np.newaxis, :]}
+    t0 = time.perf_counter()
+    with ss.SharedArrays(shared_arrays) as shared:
+        with mp.get_context(start_method).Pool(num_proc, initializer=dc.init_worker) as pool:
+            pool.map(partial(dc.create_and_check_rand_async, shared_handle=shared.handle), [(seed_seq, 1) for seed_seq in np.random.SeedSequence(0).spawn(num_proc)], chunksize=1)
+            print(time.perf_counter()-t0)
+'''
+
+
+def spinel_cell(Co_count=12, repeat=(1, 1, 1), seed=0):
+    """Creates a Co_xMn_{3-x}O_4 spinel cell with the same ordering of atoms as the 56 atom configs of the workflow (td, then oh, then O in each repeat of the cell)
+
+    Args:
+        Co_count (int): Number of Co per 24 TM sites, remaining TM sites are Mn
+        repeat (tuple): Supercell of the 56 atom conventional cell, e.g. (2, 2, 2) for 448 atoms
+        seed (int): Seed used to pick which TM sites are Mn
+
+    Returns:
+        ase Atoms object: Spinel structure with random Co/Mn substitutions on the td and oh sites
+    """
+    # Fd-3m (origin choice 2) with td sites at 8a, oh sites at 16d and O at 32e
+    unit = crystal(['Co', 'Co', 'O'], basis=[(0.125, 0.125, 0.125), (0.5, 0.5, 0.5), (0.263, 0.263, 0.263)],
+                   spacegroup=227, cellpar=[8.08, 8.08, 8.08, 90, 90, 90], setting=2)
+    unit = unit[np.argsort(unit.get_atomic_numbers() == 8, kind='stable')]
+    supercell = unit.repeat(repeat)
+    numbers = supercell.get_atomic_numbers()
+    tm_sites = np.where(numbers == 27)[0]
+    rng = np.random.default_rng(seed)
+    Mn_sites = rng.choice(tm_sites, size=len(tm_sites)-Co_count*int(np.prod(repeat)), replace=False)
+    numbers[Mn_sites] = 25
+    supercell.set_atomic_numbers(numbers)
+    return supercell
+
+def bench_check_for_equiv(ase_cell_orig, threshold=1e-3, trials=2000, str_trials=20, seed=0):
+    """Times a single random config being checked against the original config with each available method
+
+    Args:
+        ase_cell_orig (ase Atoms object): Original config
+        threshold (float): Tolerance used by spglib to identify spacegroup
+        trials (int): Number of random configs timed with the permutation table methods
+        str_trials (int): Number of random configs timed with the (much slower) str comparison method
+        seed (int): Seed for generating the random configs
+
+    Returns:
+        dict: Seconds per config for each method
+    """
+    parent_cfg = mt.de_colour(ase_cell_orig, 'Co')
+    symm_ops = spg.get_symmetry(mt.get_spglib_from_ase(parent_cfg), threshold)
+    symm_op_count = len(symm_ops['rotations'])
+    all_atoms = ase_cell_orig.get_atomic_numbers()
+    tm_sites = np.where(all_atoms != 8)[0]
+    rng = np.random.default_rng(seed)
+    rand_cfgs = np.tile(all_atoms, (trials, 1))
+    rand_cfgs[:, tm_sites] = rng.permuted(rand_cfgs[:, tm_sites], axis=1)
+
+    timings = {}
+    t0 = time.time()
+    perm_table = pk.symm_perm_table(ase_cell_orig.get_scaled_positions(), symm_ops)
+    orig_images = pk.orbit_images(all_atoms, perm_table)
+    timings['setup (per original config)'] = time.time()-t0
+
+    t0 = time.time()
+    for cfg in rand_cfgs[:str_trials]:
+        rand_cfg = Atoms(cell=ase_cell_orig.get_cell(), scaled_positions=ase_cell_orig.get_scaled_positions(), pbc=True)
+        rand_cfg.set_atomic_numbers(cfg)
+        ce.check_for_equiv(symm_ops, symm_op_count, ase_cell_orig, rand_cfg)
+    timings['str comparison'] = (time.time()-t0)/str_trials
+
+    t0 = time.time()
+    for cfg in rand_cfgs:
+        pk.check_for_equiv_numpy(orig_images, cfg)
+    timings['numpy'] = (time.time()-t0)/trials
+
+    t0 = time.time()
+    pk.count_equiv_numpy(orig_images, rand_cfgs)
+    timings['numpy (batch)'] = (time.time()-t0)/trials
+
+    if pk.HAVE_NUMBA:
+        try:
+            pk.count_equiv_numba(orig_images, rand_cfgs[:1]) # Compile before timing
+        except ImportError:
+            return timings # numba is installed but could not be imported
+        t0 = time.time()
+        for cfg in rand_cfgs:
+            pk.check_for_equiv_numba(orig_images, cfg)
+        timings['numba'] = (time.time()-t0)/trials
+
+        t0 = time.time()
+        pk.count_equiv_numba(orig_images, rand_cfgs)
+        timings['numba (batch)'] = (time.time()-t0)/trials
+    return timings
+
+def print_timings(label, timings):
+    """Prints output of a benchmark, with speedup relative to the str comparison method where it was timed
+
+    Args:
+        label (str): Description of the structure that was timed
+        timings (dict): Seconds per config for each method
+    """
+    print(label)
+    for method, secs in timings.items():
+        line = '    {0:<30s}{1:12.3e} s'.format(method, secs)
+        if ('str comparison' in timings and not method.startswith('setup')):
+            line += '   x{0:.0f}'.format(timings['str comparison']/secs)
+        print(line)
+
+
+def bench_import_time(modules, repeats=3):
+    """Times importing each module in a fresh interpreter (as a worker process started with 'spawn' or 'forkserver' does)
+
+    Args:
+        modules (list): Names of modules to import
+        repeats (int): Number of fresh interpreters per module, the fastest is reported
+
+    Returns:
+        dictionary: Module name: (seconds to import, list of heavy modules that were loaded)
+    """
+    timings = {}
+    for module in modules:
+        best = None
+        for repeat in range(repeats):
+            output = subprocess.run([sys.executable, '-c', _IMPORT_CODE.format(module=module, heavy=HEAVY_MODULES)],
+                                    cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.split('\n')
+            secs = float(output[0])
+            if (best is None or secs < best):
+                best = secs
+        timings[module] = (best, [name for name in output[1].split(',') if name])
+    return timings
+
+def bench_pool_start(start_methods, num_proc=2):
+    """Times starting a pool of worker processes (with degen_core.init_worker, as process_dataList.py) until each has attached to a shared config and tested one random config
+
+    Args:
+        start_methods (list): multiprocessing start methods, e.g. ['spawn', 'forkserver', 'fork']
+        num_proc (int): Number of worker processes
+
+    Returns:
+        dictionary: Start method: seconds
+    """
+    timings = {}
+    for start_method in start_methods:
+        if start_method not in mp.get_all_start_methods():
+            continue
+        output = subprocess.run([sys.executable, '-c', _POOL_START_CODE, start_method, str(num_proc)],
+                                cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+        timings[start_method] = float(output.split()[-1])
+    return timings
+
+
+if __name__=='__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks of equivalence checks, module imports and worker start-up')
+    parser.add_argument('poscars', nargs='*', help='POSCAR files to time equivalence checks on (default: synthetic spinel cells)')
+    parser.add_argument('--startup-only', action='store_true', help='Only time module imports and worker start-up')
+    args = parser.parse_args()
+
+    if not args.startup_only:
+        if args.poscars:
+            for poscar in args.poscars:
+                ase_cell = ase.io.read(poscar, format='vasp')
+                print_timings(poscar+' ('+str(len(ase_cell))+' atoms)', bench_check_for_equiv(ase_cell))
+        else:
+            for repeat in [(1, 1, 1), (2, 1, 1), (2, 2, 2)]:
+                ase_cell = spinel_cell(repeat=repeat)
+                print_timings('Spinel '+str(repeat)+' ('+str(len(ase_cell))+' atoms)', bench_check_for_equiv(ase_cell, str_trials=5))
+        if not pk.HAVE_NUMBA:
+            print('numba is not installed, only the NumPy fallback was timed')
+
+    # process_dataList is what 'spawn' and 'forkserver' workers re-import (as __mp_main__), degen_core is what they run
+    print('Import time in a fresh interpreter')
+    for module, (secs, heavy) in bench_import_time(['numpy', 'degen_core', 'process_dataList', 'planner', 'config_equivalence', 'visualisation_tools']).items():
+        print('    {0:<30s}{1:12.3f} s   heavy modules loaded: {2}'.format(module, secs, ', '.join(heavy) if heavy else 'none'))
+    print('Worker start-up (2 workers, until each has run one task)')
+    for start_method, secs in bench_pool_start(['spawn', 'forkserver', 'fork']).items():
+        print('    {0:<30s}{1:12.3f} s'.format(start_method, secs))
@@ -1,11 +1,8 @@
 # Methods for checking equivalence of configs
 
 import symm_ops as so
-import pandas as pd
 import numpy as np
-import ase
-import ase.io
-from ase import Atoms
+#import pandas as pd # Only needed for the commented-out pdSorted methods below
 
 
 ### Fastest methods:
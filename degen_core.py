@@ -0,0 +1,43 @@
+# Core compute methods run in worker processes
+# Depends only on NumPy (and Numba when installed) through perm_kernels, shared_state and sampling, so that starting a worker process is fast:
+# ase and spglib are only used by the main process
+
+import numpy as np
+import perm_kernels as pk
+import shared_state as ss
+import sampling as sm
+
+
+SAMPLING_ROUND = 10000 # Random configs tested between checks for convergence when sampling can stop early (multiple of sampling.BLOCK_SIZE)
+
+
+def init_worker():
+    """Initializer for worker processes ('mp.Pool(initializer=...)'), imports and loads the compiled kernel (when numba is installed)
+    so that this is done while the pool starts rather than during the first block of random configs
+    """
+    pk.count_equiv_perm(np.zeros((1, 1), dtype=np.uint8), np.zeros((1, 1), dtype=np.uint8))
+
+def create_and_check_rand_async(task, shared_handle):
+    """Workflow made into a function for compatibility with 'pool.map', which process_dataList.sample_degeneracy calls with one task per block.
+    Actions of workflow:
+    - Attaches to the read-only arrays for the current config placed in shared memory by the main process (no copy is made)
+    - Creates a block of random configs from the task's own random stream, each a random permutation of the atoms
+      of every sublattice of the original config (i.e. substitutions in the alloy), see sampling.random_colourings
+    - Calls the function count_equiv_perm to compare each random config with the original config after each symmetry operation of the parent
+
+    Args:
+        task (tuple): (numpy SeedSequence for this block, number of random configs in the block), see sampling.block_sizes
+        shared_handle (tuple): Handle of the shared_state.SharedArrays for the current config, with arrays:
+            'sub_atoms' (atomic numbers of original config on the substitutable sites, sublattice by sublattice),
+            'sublattice_bounds' (sublattice i is sub_atoms[sublattice_bounds[i]:sublattice_bounds[i+1]]),
+            'orig_images' (original config after each symmetry operation of the parent config, see perm_kernels.orbit_images)
+
+    Returns:
+        int: Number of random configs in the block that are equivalent to the original config
+    """
+    seed_seq, size = task
+    shared = ss.attach(shared_handle)
+    # Random stream depends only on the block, not on which worker process runs it
+    rng = np.random.default_rng(seed_seq)
+    rand_cfgs = sm.random_colourings(rng, shared['sub_atoms'], shared['sublattice_bounds'], size)
+    return pk.count_equiv_perm(shared['orig_images'], rand_cfgs)
@@ -0,0 +1,290 @@
+# In-process API for the symmetry degeneracy of many configs sharing the same parent structure
+
+import itertools
+import numpy as np
+# Ensuring correct version of spglib is imported
+try:
+    import spglib as spg
+except ImportError:
+    from pyspglib import spglib as spg
+import misc_tools as mt
+import perm_kernels as pk
+import result_cache as rc
+import sampling as sm
+
+
+class DegeneracyEngine:
+    """Symmetry degeneracy of configs of one parent structure, set up once and reused for any number of configs
+    Symmetry operations, sublattices, the permutation table and per-composition data are computed on first use and cached
+    Atoms are only substituted amongst the sites of the same sublattice, which can hold any number of species,
+    and only the substitutable sites (those of the sublattices) are compared, so other sites add nothing to the cost per config
+
+    Methods:
+    - 'exact': number of distinct configs obtained by applying every symmetry operation of the parent to the config (size of its orbit)
+    - 'enumerate': every possible substitution amongst the sites of each sublattice is checked for equivalence (same result as 'exact')
+    - 'sampled': same estimate as process_dataList.py, (combinations-1)*scaling random configs are checked for equivalence,
+      degeneracy is 1 + (fraction of random configs that are equivalent)*(combinations-1), i.e. the number of matches divided by scaling
+      plus 1 (converges to the 'exact' value as scaling increases)
+
+    Args:
+        parent_cfg (ase Atoms object): Parent structure, e.g. misc_tools.de_colour(ase_cell_orig, 'Co')
+        threshold (float): Tolerance used by spglib to identify spacegroup
+        sublattices (dictionary): Label: indices of the sites of each sublattice, found with misc_tools.detect_sublattices when None
+        species (list): Species of the parent on the substitutable sites (e.g. ['Co'] for a parent from de_colour(ase_cell_orig, 'Co')),
+            used when detecting sublattices, None treats every site of the parent as substitutable
+        method (str): Either 'exact', 'enumerate' or 'sampled'
+        scaling (int): scaling*total_combinations random configs are tested per config when method is 'sampled'
+        seed (int): Seed for random configs when method is 'sampled', the n-th call of degeneracy uses the same random stream as
+            the n-th config of a data list in process_dataList.py with the same seed (None for a new seed each time)
+        batch_size (int): Number of random configs generated (from one random stream) and checked at once when method is 'sampled'
+        cache (result_cache.ResultCache): Optional store of previous results, looked up before and updated after each calculation
+    """
+    def __init__(self, parent_cfg, threshold=1e-3, sublattices=None, species=None, method='exact', scaling=100, seed=None, batch_size=sm.BLOCK_SIZE, cache=None):
+        if method not in ('exact', 'enumerate', 'sampled'):
+            raise ValueError('Error in method selection, should be exact, enumerate or sampled')
+        self.parent_cfg = parent_cfg
+        self.threshold = threshold
+        self.species = species
+        self.method = method
+        self.scaling = scaling
+        self.batch_size = batch_size
+        self._seed_seq = np.random.SeedSequence(seed)
+        self._positions = parent_cfg.get_scaled_positions()
+        self._sublattices = None if sublattices is None else {label: np.asarray(sites, dtype=int) for label, sites in sublattices.items()}
+        self._symm_ops = None
+        self._perm_table = None
+        self._composition_data = {}
+        self.cache = cache
+        self._parent_fp = None
+        self._sub_site_order = None
+
+    @property
+    def symm_ops(self):
+        """dictionary: Symmetry operations of the parent from spglib (computed on first use)"""
+        if self._symm_ops is None:
+            self._symm_ops = spg.get_symmetry(mt.get_spglib_from_ase(self.parent_cfg), self.threshold)
+        return self._symm_ops
+
+    @property
+    def symm_op_count(self):
+        """int: Total number of symmetry operations of the parent"""
+        return len(self.symm_ops['rotations'])
+
+    @property
+    def sublattices(self):
+        """dictionary: Label: np array of site indices of each sublattice (detected on first use if not given)"""
+        if self._sublattices is None:
+            self._sublattices = mt.detect_sublattices(self.parent_cfg, self.threshold, self.species)
+        return self._sublattices
+
+    @property
+    def sub_sites(self):
+        """np array: Indices of the substitutable sites, sublattice by sublattice (order of the columns of perm_table)"""
+        return np.concatenate(list(self.sublattices.values()))
+
+    @property
+    def sublattice_bounds(self):
+        """np array: Sublattice i is columns sublattice_bounds[i]:sublattice_bounds[i+1] of perm_table and orbit_images"""
+        return np.cumsum([0] + [len(sites) for sites in self.sublattices.values()])
+
+    @property
+    def perm_table(self):
+        """np array: Permutation of the substitutable sites by each symmetry operation of the parent (computed on first use)
+        Entries are columns (positions in sub_sites) rather than site indices of the parent
+        """
+        if self._perm_table is None:
+            self._perm_table = pk.symm_perm_table(self._positions[self.sub_sites], self.symm_ops)
+        return self._perm_table
+
+    @property
+    def parent_fp(self):
+        """tuple: Fingerprint and canonical site order of the parent, see result_cache.parent_fingerprint"""
+        if self._parent_fp is None:
+            self._parent_fp = rc.parent_fingerprint(self.parent_cfg)
+        return self._parent_fp
+
+    def config_fp(self, orig_images):
+        """Fingerprint of a config for the result cache, see result_cache.config_fingerprint
+
+        Args:
+            orig_images (np array): Config after each symmetry operation of the parent (orbit_images)
+
+        Returns:
+            str: Fingerprint of the config
+            str: Fingerprint of the parent
+        """
+        parent_fp, site_order = self.parent_fp
+        if self._sub_site_order is None:
+            # Canonical order of the parent, restricted to the substitutable sites (other sites are the same for every config)
+            rank = np.empty(len(site_order), dtype=int)
+            rank[site_order] = np.arange(len(site_order))
+            self._sub_site_order = np.argsort(rank[self.sub_sites])
+        return rc.config_fingerprint(orig_images, self._sub_site_order), parent_fp
+
+    def composition(self, ase_cell):
+        """Number of atoms of each species on each sublattice of a config, used as key for per-composition data
+
+        Args:
+            ase_cell (ase Atoms object): Config with the same sites as the parent
+
+        Returns:
+            tuple: For each sublattice, tuple of (atomic number, count) pairs
+        """
+        numbers = ase_cell.get_atomic_numbers()
+        return tuple(tuple((int(number), int(count)) for number, count in zip(*np.unique(numbers[sites], return_counts=True)))
+                     for sites in self.sublattices.values())
+
+    def composition_data(self, composition):
+        """Data shared by all configs with the same number of atoms of each species on each sublattice (cached)
+
+        Args:
+            composition (tuple): Output of composition
+
+        Returns:
+            dictionary: 'combinations' (total number of combinations) and 'attempts' (random configs tested when method is 'sampled')
+        """
+        if composition not in self._composition_data:
+            combinations = mt.calc_sublattice_combs([[count for number, count in sublattice] for sublattice in composition])
+            self._composition_data[composition] = {'combinations': combinations, 'attempts': int((combinations-1)*self.scaling)}
+        return self._composition_data[composition]
+
+    def sub_atoms(self, ase_cell):
+        """np array: Atomic numbers of a config on the substitutable sites (uint8, in the order of sub_sites)"""
+        self._check_sites(ase_cell)
+        return ase_cell.get_atomic_numbers()[self.sub_sites].astype(np.uint8)
+
+    def orbit_images(self, ase_cell):
+        """Config after each symmetry operation of the parent, see perm_kernels.orbit_images
+
+        Args:
+            ase_cell (ase Atoms object): Config with the same sites as the parent
+
+        Returns:
+            np array: Atomic numbers on the substitutable sites, of shape (symm_op_count, number of substitutable sites)
+        """
+        return pk.orbit_images(self.sub_atoms(ase_cell), self.perm_table)
+
+    def degeneracy(self, ase_cell):
+        """Symmetry degeneracy of a single config
+
+        Args:
+            ase_cell (ase Atoms object): Config with the same sites (in the same order) as the parent
+
+        Returns:
+            float: Symmetry degeneracy (an integer value when method is 'exact')
+        """
+        seed_seq = self._seed_seq.spawn(1)[0] # One random stream for each config, as in process_dataList.py
+        sub_atoms = self.sub_atoms(ase_cell)
+        composition_data = self.composition_data(self.composition(ase_cell))
+        # Alloy end-members only have a symm degen of self
+        if (composition_data['combinations'] == 1):
+            return 1.0
+        orig_images = pk.orbit_images(sub_atoms, self.perm_table)
+        if self.cache is not None:
+            cache_key = self.config_fp(orig_images) + (self.threshold, self.method, self.scaling)
+            degeneracy = self.cache.get(*cache_key)
+            if degeneracy is not None:
+                return degeneracy
+        if (self.method == 'exact'):
+            degeneracy = float(len(np.unique(orig_images, axis=0)))
+        elif (self.method == 'enumerate'):
+            degeneracy = float(self.count_enumerated(sub_atoms, orig_images))
+        else:
+            attempts = composition_data['attempts']
+            degeneracy_count = self.count_sampled(sub_atoms, orig_images, attempts, seed_seq)
+            # Add 1 because all configs have symm degen of self (same as the number of matches divided by scaling plus 1 for integer attempts)
+            degeneracy = 1 + float(degeneracy_count)/float(attempts)*(composition_data['combinations']-1) if attempts > 0 else 1.0
+        if self.cache is not None:
+            self.cache.put(*cache_key, degeneracy)
+        return degeneracy
+
+    def degeneracy_many(self, list_of_atoms):
+        """Symmetry degeneracy of many configs with the same parent, setup of the parent is only done once
+
+        Args:
+            list_of_atoms (list): ase Atoms objects with the same sites (in the same order) as the parent
+
+        Returns:
+            list: Symmetry degeneracy of each config
+        """
+        return [self.degeneracy(ase_cell) for ase_cell in list_of_atoms]
+
+    def count_sampled(self, sub_atoms, orig_images, attempts, seed_seq):
+        """Number of random substitutions (amongst the sites of each sublattice) that are equivalent to the original config
+
+        Args:
+            sub_atoms (np array): Atomic numbers of the original config on the substitutable sites (sub_atoms)
+            orig_images (np array): Original config after each symmetry operation of the parent (orbit_images)
+            attempts (int): Number of random configs to generate and check
+            seed_seq (numpy SeedSequence): Block i of batch_size random configs uses the random stream of its i-th spawned child
+
+        Returns:
+            int: Number of random configs that are equivalent to the original config
+        """
+        sizes = sm.block_sizes(attempts, self.batch_size)
+        degeneracy_count = 0
+        for block_seed_seq, size in zip(seed_seq.spawn(len(sizes)), sizes):
+            rand_cfgs = sm.random_colourings(np.random.default_rng(block_seed_seq), sub_atoms, self.sublattice_bounds, size)
+            degeneracy_count += pk.count_equiv_perm(orig_images, rand_cfgs)
+        return degeneracy_count
+
+    def count_enumerated(self, sub_atoms, orig_images):
+        """Number of all possible substitutions (amongst the sites of each sublattice) that are equivalent to the original config
+
+        Args:
+            sub_atoms (np array): Atomic numbers of the original config on the substitutable sites (sub_atoms)
+            orig_images (np array): Original config after each symmetry operation of the parent (orbit_images)
+
+        Returns:
+            int: Number of equivalent configs, including the original config itself
+        """
+        bounds = self.sublattice_bounds
+        slices = [slice(first, last) for (first, last) in zip(bounds[:-1], bounds[1:])]
+        all_arrangements = [arrangements(sub_atoms[sites]) for sites in slices]
+        # One batch of configs for each arrangement of the other sublattices, with every arrangement of the sublattice with the most
+        largest = int(np.argmax([len(sublattice_arrangements) for sublattice_arrangements in all_arrangements]))
+        cfgs = np.tile(sub_atoms.astype(np.uint8), (len(all_arrangements[largest]), 1))
+        cfgs[:, slices[largest]] = all_arrangements[largest]
+        others = [i for i in range(len(slices)) if i != largest]
+        degeneracy_count = 0
+        for other_arrangements in itertools.product(*[all_arrangements[i] for i in others]):
+            for i, arrangement in zip(others, other_arrangements):
+                cfgs[:, slices[i]] = arrangement
+            degeneracy_count += pk.count_equiv_perm(orig_images, cfgs)
+        return degeneracy_count
+
+    def _check_sites(self, ase_cell):
+        """Raises ValueError if a config does not have the same sites (in the same order) as the parent"""
+        positions = ase_cell.get_scaled_positions()
+        if (positions.shape != self._positions.shape):
+            raise ValueError('Config does not have the same number of sites as the parent of this DegeneracyEngine')
+        diff = positions - self._positions
+        if (np.absolute(diff - np.rint(diff)).max() > 1e-3):
+            raise ValueError('Config does not have the same sites as the parent of this DegeneracyEngine')
+
+
+def arrangements(species):
+    """All distinct orderings of the atoms on a set of sites (permutations of a multiset)
+
+    Args:
+        species (np array): Atomic numbers of the atoms on the sites
+
+    Returns:
+        np array: uint8 array of shape (number of arrangements, number of sites)
+    """
+    species = np.asarray(species)
+    site_count = len(species)
+    values, counts = np.unique(species, return_counts=True)
+    if (len(values) == 1):
+        return np.full((1, site_count), values[0], dtype=np.uint8)
+    # Choose the sites of the first species, then arrange the remaining species on the remaining sites
+    rest = arrangements(np.repeat(values[1:], counts[1:]))
+    result = []
+    for chosen in itertools.combinations(range(site_count), int(counts[0])):
+        block = np.empty((len(rest), site_count), dtype=np.uint8)
+        mask = np.zeros(site_count, dtype=bool)
+        mask[list(chosen)] = True
+        block[:, mask] = values[0]
+        block[:, ~mask] = rest
+        result.append(block)
+    return np.concatenate(result, axis=0)
@@ -0,0 +1,144 @@
+# Methods for converting .info data files into a columnar binary format (one .npy file per column) and back
+# Columns can be appended without rewriting existing data and are memory-mapped when loaded
+
+import os
+import json
+import argparse
+import numpy as np
+
+
+INDEX_FILE = 'columns.json' # Column names, files and number of rows, kept in the columns directory
+
+
+def read_info(info_file):
+    """Reads a .info data file, where the first line is '# ' followed by comma separated column names
+
+    Args:
+        info_file (str): Location of .info file
+
+    Returns:
+        list: Column names
+        np array: Data of shape (number of rows, number of columns)
+    """
+    with open(info_file) as f:
+        header = f.readline()
+    names = [name.strip() for name in header.lstrip('#').split(',')]
+    data = np.loadtxt(info_file, comments='#', ndmin=2)
+    if (data.shape[1] != len(names)):
+        raise ValueError('Number of column names in header of '+info_file+' does not match number of columns')
+    return names, data
+
+def _read_index(cols_dir):
+    with open(os.path.join(cols_dir, INDEX_FILE)) as f:
+        return json.load(f)
+
+def _write_index(cols_dir, index):
+    # Index is replaced in one step, so a column only appears once its data has been written
+    tmp_file = os.path.join(cols_dir, INDEX_FILE+'.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_file, os.path.join(cols_dir, INDEX_FILE))
+
+def columns_match_info(cols_dir, info_file, added_columns=()):
+    """Checks that a columns directory is an up-to-date copy of a .info data file
+
+    Args:
+        cols_dir (str): Columns directory
+        info_file (str): Location of .info file
+        added_columns (list): Names of columns appended to the columns directory that are not in the .info file
+
+    Returns:
+        bool: False if the columns directory does not exist, was written before the .info file was last changed,
+        or has different columns or number of rows to the .info file
+    """
+    index_file = os.path.join(cols_dir, INDEX_FILE)
+    if not os.path.exists(index_file):
+        return False
+    if (os.path.getmtime(info_file) > os.path.getmtime(index_file)):
+        return False
+    names, data = read_info(info_file)
+    index = _read_index(cols_dir)
+    existing = [column['name'] for column in index['columns'] if column['name'] not in added_columns]
+    return (existing == names and index['rows'] == data.shape[0])
+
+def info_to_columns(info_file, cols_dir):
+    """Converts a .info data file into a columns directory
+
+    Args:
+        info_file (str): Location of .info file
+        cols_dir (str): Directory to write columns to (created if it does not exist, existing columns are replaced)
+    """
+    names, data = read_info(info_file)
+    os.makedirs(cols_dir, exist_ok=True)
+    _write_index(cols_dir, {'rows': int(data.shape[0]), 'columns': []})
+    for name, values in zip(names, data.T):
+        append_column(cols_dir, name, values)
+
+def columns_to_info(cols_dir, info_file):
+    """Converts a columns directory into a .info data file (same format as the files written by earlier steps of the workflow)
+
+    Args:
+        cols_dir (str): Columns directory
+        info_file (str): Location of .info file to write
+    """
+    columns = load_columns(cols_dir)
+    data = np.column_stack(list(columns.values())) if columns else np.empty((0, 0))
+    np.savetxt(info_file, data, header=', '.join(columns.keys()), comments='# ')
+
+def append_column(cols_dir, name, values, replace=False):
+    """Adds a column to a columns directory, existing columns are not read or rewritten
+
+    Args:
+        cols_dir (str): Columns directory
+        name (str): Column name, e.g. 'symm_degen_frac'
+        values (list): Value for each row
+        replace (bool): Replace the column if one with the same name already exists (otherwise ValueError is raised)
+    """
+    index = _read_index(cols_dir)
+    values = np.asarray(values, dtype=np.float64)
+    if (values.shape != (index['rows'],)):
+        raise ValueError('Column '+name+' has '+str(len(values))+' values, columns in '+cols_dir+' have '+str(index['rows'])+' rows')
+    existing = [column['name'] for column in index['columns']]
+    if (name in existing and not replace):
+        raise ValueError('Column '+name+' already exists in '+cols_dir)
+    file_name = '{0:03d}.npy'.format(len(index['columns'])) if name not in existing else index['columns'][existing.index(name)]['file']
+    tmp_file = os.path.join(cols_dir, 'tmp_'+file_name)
+    np.save(tmp_file, values)
+    os.replace(tmp_file, os.path.join(cols_dir, file_name))
+    if name not in existing:
+        index['columns'].append({'name': name, 'file': file_name})
+        _write_index(cols_dir, index)
+
+def load_columns(cols_dir, mmap=True):
+    """Loads all columns of a columns directory
+
+    Args:
+        cols_dir (str): Columns directory
+        mmap (bool): Memory-map the columns (read-only) rather than reading them into memory
+
+    Returns:
+        dictionary: Column name: np array of values, in the same order as the columns of the .info file
+    """
+    index = _read_index(cols_dir)
+    return {column['name']: np.load(os.path.join(cols_dir, column['file']), mmap_mode='r' if mmap else None) for column in index['columns']}
+
+def load_column(cols_dir, name, mmap=True):
+    """Loads a single column of a columns directory (see load_columns)"""
+    index = _read_index(cols_dir)
+    for column in index['columns']:
+        if (column['name'] == name):
+            return np.load(os.path.join(cols_dir, column['file']), mmap_mode='r' if mmap else None)
+    raise KeyError('No column '+name+' in '+cols_dir)
+
+
+if __name__=='__main__':
+
+    parser = argparse.ArgumentParser(description='Convert between .info data files and columns directories')
+    parser.add_argument('direction', choices=['to-columns', 'to-info'])
+    parser.add_argument('source', help='.info file (to-columns) or columns directory (to-info)')
+    parser.add_argument('destination', help='Columns directory (to-columns) or .info file (to-info)')
+    args = parser.parse_args()
+    if (args.direction == 'to-columns'):
+        info_to_columns(args.source, args.destination)
+    else:
+        columns_to_info(args.source, args.destination)
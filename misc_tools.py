@@ -1,8 +1,12 @@
-import ase
-import ase.io
 import math
 from ase import Atoms
+from ase.data import atomic_numbers
 import numpy as np
+# Ensuring correct version of spglib is imported
+try:
+    import spglib as spg
+except ImportError:
+    from pyspglib import spglib as spg
 
 
 # Methods for converting between ase and spglib cell formats
@@ -35,42 +39,104 @@ def get_ase_from_spglib(spglib_cell):
 
 
 # For preparing parent of given configuration
-def de_colour(ase_cell, species):
-    """Function used to convert all Mn into Co or all Co into Mn (i.e. 'de-colour' config to generate the parent for symmetry analysis)
+def de_colour(ase_cell, species, alloy_species=('Co', 'Mn')):
+    """Function used to convert all atoms of the alloy species into one of them (i.e. 'de-colour' config to generate the parent for symmetry analysis)
 
     Args:
         ase_cell (ase Atoms object): Original config to make parent of
-        species (str): Either 'Co' or 'Mn' depending on which species the alloy should be 'de-coloured' to
+        species (str): Species the alloy should be 'de-coloured' to, one of alloy_species (e.g. 'Co' or 'Mn')
+        alloy_species (list): Species that substitute for each other in the alloy, e.g. ['Co', 'Mn', 'Fe'] for a ternary alloy
 
     Returns:
-        ase Atoms object: Object modified so that all TMs are either Co or Mn
+        ase Atoms object: Object modified so that all atoms of the alloy species are the chosen species
     """
-    str_atoms = ase_cell.get_atomic_numbers().astype(str)
-    if (species == 'Mn'):
-        de_colour_atoms = np.char.replace(str_atoms, '27', '25')
-    elif (species == 'Co'):
-        de_colour_atoms = np.char.replace(str_atoms, '25', '27')
-    else:
-        print('Error in species selection, should be Co or Mn')
-    int_atoms_de_colour = de_colour_atoms.astype(int)
+    if species not in alloy_species:
+        raise ValueError('Error in species selection, should be one of '+', '.join(alloy_species))
+    all_atoms = ase_cell.get_atomic_numbers()
+    alloy_numbers = [atomic_numbers[symbol] for symbol in alloy_species]
+    de_colour_atoms = np.where(np.isin(all_atoms, alloy_numbers), atomic_numbers[species], all_atoms)
     de_coloured_ase_cell = Atoms(cell=ase_cell.get_cell(), scaled_positions=ase_cell.get_scaled_positions(), pbc=True)
-    de_coloured_ase_cell.set_atomic_numbers(int_atoms_de_colour)
+    de_coloured_ase_cell.set_atomic_numbers(de_colour_atoms)
     return de_coloured_ase_cell
 
 
-def calc_combs(Co_td, Co_oh):
-    """Calculate total number of combinations for fixed number of Co on td and oh sites
+# For counting combinations of substitutions in the alloy
+def calc_multinomial(counts):
+    """Number of distinct arrangements of atoms on a set of sites, (sum of counts)!/(product of count!) as an exact integer
+
+    Args:
+        counts (list): Number of atoms of each species on the sites
+
+    Returns:
+        int: Number of distinct arrangements
+    """
+    total = 0
+    arrangements = 1
+    for count in counts:
+        total += int(count)
+        arrangements *= math.comb(total, int(count))
+    return arrangements
+
+def calc_sublattice_combs(sublattice_counts):
+    """Calculate total number of combinations for a fixed number of atoms of each species on each sublattice
+    Product over sublattices of the number of distinct arrangements of the atoms on that sublattice
+
+    Args:
+        sublattice_counts (list): Number of atoms of each species on each sublattice (list of counts for each sublattice)
+
+    Returns:
+        int: Total number of combinations
+    """
+    total_combs = 1
+    for counts in sublattice_counts:
+        total_combs *= calc_multinomial(counts)
+    return total_combs
+
+def calc_combs(Co_td, Co_oh, n_td=8, n_oh=16):
+    """Calculate total number of combinations for fixed number of Co on td and oh sites of a binary spinel
     n_td!/ r_td!*(n_td-r_td)! * n_oh!/ r_oh!*(n_oh-r_oh)!
     Where n is total number of td or oh sites and r is the number occupies by Co
 
     Args:
         Co_td (int): Number of Co on tetrahedral sites in the structure
         Co_oh (int): Number of Co on octahedral sites in the structure
+        n_td (int): Number of td sites, default is the 56 atom Co_xMn_{3-x}O_4 cell
+        n_oh (int): Number of oh sites, default is the 56 atom Co_xMn_{3-x}O_4 cell
 
     Returns:
         int: total number of combinations based on fixed number of Co on td and oh sites inputted
     """
-    oh_combs = math.factorial(16)/(math.factorial(Co_oh)*math.factorial(16- Co_oh))
-    td_combs = math.factorial(8)/(math.factorial(Co_td)*math.factorial(8-Co_td))
-    total_combs = oh_combs*td_combs
-    return total_combs
\ No newline at end of file
+    return calc_multinomial([Co_td, n_td-Co_td]) * calc_multinomial([Co_oh, n_oh-Co_oh])
+
+
+# For finding the sublattices of a parent structure
+def detect_sublattices(parent_cfg, threshold, species=None):
+    """Groups the sites of a parent into sublattices of symmetrically equivalent sites (one for each Wyckoff orbit found by spglib)
+
+    Args:
+        parent_cfg (ase Atoms object): Parent structure, e.g. from de_colour
+        threshold (float): Tolerance used by spglib to identify spacegroup
+        species (list): Only sublattices occupied by these species in the parent are returned (e.g. ['Co']), None for all sublattices
+
+    Returns:
+        dictionary: Label (species, number of sites and Wyckoff letter, e.g. 'Co 8b'): np array of site indices, in order of first site
+    """
+    dataset = spg.get_symmetry_dataset(get_spglib_from_ase(parent_cfg), symprec=threshold)
+    if dataset is None:
+        raise ValueError('Error in finding symmetry of parent with spglib')
+    # Datasets are objects in newer versions of spglib and dictionaries in older versions
+    if isinstance(dataset, dict):
+        equivalent_atoms, wyckoffs = np.asarray(dataset['equivalent_atoms']), dataset['wyckoffs']
+    else:
+        equivalent_atoms, wyckoffs = np.asarray(dataset.equivalent_atoms), dataset.wyckoffs
+    symbols = parent_cfg.get_chemical_symbols()
+    sublattices = {}
+    for rep in np.unique(equivalent_atoms):
+        if (species is not None and symbols[rep] not in species):
+            continue
+        sites = np.flatnonzero(equivalent_atoms == rep)
+        label = symbols[rep]+' '+str(len(sites))+wyckoffs[rep]
+        if label in sublattices:
+            label += ' ('+str(rep)+')' # Different orbits with the same Wyckoff letter (e.g. in supercells of lower symmetry)
+        sublattices[label] = sites
+    return dict(sorted(sublattices.items(), key=lambda item: item[1][0]))
\ No newline at end of file
@@ -0,0 +1,205 @@
+# Methods for checking equivalence of configs using integer occupancy arrays and permutation tables
+# Only NumPy is required, Numba is used (when installed) to compile the apply-and-compare inner loop
+
+import importlib.util
+import numpy as np
+
+# Numba is optional, fall back on vectorised NumPy if it is not available
+# It is only imported when the compiled kernel is first used, as importing it is slow (and slows down starting worker processes)
+# HAVE_NUMBA is set to False if that import fails (e.g. installed numba does not support the installed NumPy)
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+_numba_kernels = None
+
+
+def symm_perm_table(positions, symm_ops, tol=1e-3):
+    """Converts spglib symmetry operations into a table of site permutations for a fixed set of atomic positions
+    Operation op_num maps site i at fractional coords x onto site perm_table[op_num, i] at R.x + t (modulo lattice vectors)
+
+    Args:
+        positions (np array): Fractional atomic positions of the parent config (object.get_scaled_positions())
+        symm_ops (dictionary): Symmetry operations outputted by spglib with keys ['rotations'] and ['translations']
+        tol (float): Largest difference in fractional coords for a transformed site to be matched to a site of the parent
+
+    Returns:
+        np array: Integer array of shape (symm_op_count, number of sites), each row is a permutation of the site indices
+    """
+    positions = np.asarray(positions, dtype=float)
+    site_count = len(positions)
+    symm_op_count = len(symm_ops['rotations'])
+    # Sites are first looked up by their coords rounded onto a grid of spacing tol
+    grid_keys = _grid_keys(positions, tol)
+    key_order = np.argsort(grid_keys)
+    sorted_keys = grid_keys[key_order]
+    perm_table = np.empty((symm_op_count, site_count), dtype=np.intp)
+    for op_num in range(symm_op_count):
+        new_positions = np.matmul(positions, np.transpose(symm_ops['rotations'][op_num])) + symm_ops['translations'][op_num]
+        new_keys = _grid_keys(new_positions, tol)
+        found = np.minimum(np.searchsorted(sorted_keys, new_keys), site_count-1)
+        match = key_order[found]
+        if (np.any(sorted_keys[found] != new_keys) or len(np.unique(match)) != site_count):
+            # Rounding put a site on the wrong side of a grid line, compare distances (in fractional coords) to every parent site instead
+            diff = new_positions[:, np.newaxis, :] - positions[np.newaxis, :, :]
+            diff -= np.rint(diff)
+            dist = np.absolute(diff).max(axis=2)
+            match = dist.argmin(axis=1)
+            if (np.any(dist[np.arange(site_count), match] > tol) or len(np.unique(match)) != site_count):
+                raise ValueError('Symmetry operation '+str(op_num)+' does not map the sites of the parent onto themselves, check tol')
+        perm_table[op_num] = match
+    return perm_table
+
+def _grid_keys(positions, tol):
+    """Single integer for each site from fractional coords wrapped into [0, 1) and rounded onto a grid of spacing tol
+    Grid is offset so that simple fractions (e.g. 1/16 for tol=1e-3) do not fall halfway between grid points"""
+    grid_count = int(round(1.0/tol))
+    grid = np.floor((positions % 1.0)*grid_count + 0.382).astype(np.int64) % grid_count
+    return (grid[:, 0]*grid_count + grid[:, 1])*grid_count + grid[:, 2]
+
+def orbit_images(numbers, perm_table):
+    """Occupancy of the sites after each symmetry operation has been applied to a config, compared against in the checks below
+
+    Args:
+        numbers (np array): Atomic numbers of each site in the original config (object.get_atomic_numbers())
+        perm_table (np array): Site permutations from symm_perm_table
+
+    Returns:
+        np array: uint8 array of shape (symm_op_count, number of sites), a random config is equivalent to the original if it matches any row
+    """
+    return np.asarray(numbers).astype(np.uint8)[perm_table]
+
+
+### Pure-NumPy methods:
+
+def check_for_equiv_numpy(images, cfg):
+    """Vectorised NumPy version of check_for_equiv_perm (no early exit, all symmetry operations are compared at once)
+
+    Args:
+        images (np array): Output of orbit_images for the original config
+        cfg (np array): Atomic numbers of each site in the random config
+
+    Returns:
+        bool: True if at least one match is found after applying symmetry operations, False otherwise
+    """
+    return bool(np.any(np.all(images == cfg, axis=1)))
+
+def count_equiv_numpy(images, cfgs, chunk_size=256):
+    """Vectorised NumPy version of count_equiv_perm, random configs are compared in chunks to limit memory use
+
+    Args:
+        images (np array): Output of orbit_images for the original config
+        cfgs (np array): Atomic numbers of each site for a batch of random configs, shape (batch, number of sites)
+        chunk_size (int): Number of random configs compared against all symmetry operations at once
+
+    Returns:
+        int: Number of random configs that are equivalent to the original config
+    """
+    equiv_count = 0
+    for start in range(0, len(cfgs), chunk_size):
+        chunk = cfgs[start:start+chunk_size]
+        equiv_count += int(np.count_nonzero(np.any(np.all(images[np.newaxis, :, :] == chunk[:, np.newaxis, :], axis=2), axis=1)))
+    return equiv_count
+
+
+### Numba methods (compiled on first call, cached on disk):
+
+def _get_numba_kernels():
+    """Imports numba and defines the compiled kernels on first use
+    If numba cannot be imported, HAVE_NUMBA is set to False so the NumPy methods are used for the rest of the process
+
+    Returns:
+        tuple: Compiled functions (first_match, count_matches)
+    """
+    global _numba_kernels, HAVE_NUMBA
+    if _numba_kernels is None:
+        try:
+            import numba
+        except ImportError:
+            HAVE_NUMBA = False
+            raise
+
+        @numba.njit(cache=True, nogil=True)
+        def first_match(images, cfg):
+            for op_num in range(images.shape[0]):
+                is_same = True
+                for site in range(images.shape[1]):
+                    if images[op_num, site] != cfg[site]:
+                        is_same = False
+                        break
+                if is_same:
+                    return True # Return as soon as any match is found
+            return False
+
+        @numba.njit(cache=True, nogil=True)
+        def count_matches(images, cfgs):
+            equiv_count = 0
+            for cfg_num in range(cfgs.shape[0]):
+                if first_match(images, cfgs[cfg_num]):
+                    equiv_count += 1
+            return equiv_count
+
+        _numba_kernels = (first_match, count_matches)
+    return _numba_kernels
+
+def check_for_equiv_numba(images, cfg):
+    """Compiled version of check_for_equiv_perm, returns as soon as any symmetry operation gives a match
+
+    Args:
+        images (np array): Output of orbit_images for the original config
+        cfg (np array): Atomic numbers of each site in the random config
+
+    Returns:
+        bool: True if at least one match is found after applying symmetry operations, False otherwise
+    """
+    if not HAVE_NUMBA:
+        raise ImportError('numba is not available, use check_for_equiv_numpy instead')
+    return bool(_get_numba_kernels()[0](images, np.asarray(cfg).astype(np.uint8)))
+
+def count_equiv_numba(images, cfgs):
+    """Compiled version of count_equiv_perm
+
+    Args:
+        images (np array): Output of orbit_images for the original config
+        cfgs (np array): Atomic numbers of each site for a batch of random configs, shape (batch, number of sites)
+
+    Returns:
+        int: Number of random configs that are equivalent to the original config
+    """
+    if not HAVE_NUMBA:
+        raise ImportError('numba is not available, use count_equiv_numpy instead')
+    return int(_get_numba_kernels()[1](images, np.asarray(cfgs).astype(np.uint8)))
+
+
+### Methods used by the workflow, compiled kernel is picked automatically when available:
+
+def check_for_equiv_perm(images, cfg):
+    """Integer equivalent of config_equivalence.check_for_equiv: checks if any symmetry operation maps the random config onto the original
+
+    Args:
+        images (np array): Output of orbit_images for the original config
+        cfg (np array): Atomic numbers of each site in the random config
+
+    Returns:
+        bool: True if at least one match is found after applying symmetry operations, False otherwise
+    """
+    if HAVE_NUMBA:
+        try:
+            return check_for_equiv_numba(images, cfg)
+        except ImportError:
+            pass # numba is installed but could not be imported, HAVE_NUMBA is now False
+    return check_for_equiv_numpy(images, cfg)
+
+def count_equiv_perm(images, cfgs):
+    """Batch version of check_for_equiv_perm
+
+    Args:
+        images (np array): Output of orbit_images for the original config
+        cfgs (np array): Atomic numbers of each site for a batch of random configs, shape (batch, number of sites)
+
+    Returns:
+        int: Number of random configs that are equivalent to the original config
+    """
+    if HAVE_NUMBA:
+        try:
+            return count_equiv_numba(images, cfgs)
+        except ImportError:
+            pass # numba is installed but could not be imported, HAVE_NUMBA is now False
+    return count_equiv_numpy(images, cfgs)
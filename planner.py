@@ -0,0 +1,196 @@
+# Methods for planning how the symmetry degeneracy of each config in a data list is computed, before any work is done
+
+import os
+import math
+import time
+import hashlib
+import numpy as np
+import ase
+import ase.io
+from ase.data import chemical_symbols
+import misc_tools as mt
+import perm_kernels as pk
+import degen_core as dc
+from degeneracy_engine import DegeneracyEngine
+
+
+STRATEGIES = ('exact', 'enumerate', 'sampled') # Strategies that can be chosen for configs that are not end-members
+MAX_ENUMERATE = 10**7 # Largest number of combinations considered for 'enumerate'
+CALIBRATION_TRIALS = 500 # Random configs timed to estimate cost per trial, once per parent and composition
+
+
+def get_engine(engines, parent_cfg, threshold, species=None):
+    """DegeneracyEngine for a parent, reused for every config in the data list with the same parent (so spglib only runs once per parent)
+
+    Args:
+        engines (dictionary): Engines created so far, updated in place
+        parent_cfg (ase Atoms object): Parent structure
+        threshold (float): Tolerance used by spglib to identify spacegroup
+        species (list): Species of the parent on the substitutable sites, see DegeneracyEngine
+
+    Returns:
+        DegeneracyEngine: Engine for the parent
+    """
+    # Engines depend on the order of the sites as well as the parent itself
+    sha = hashlib.sha256()
+    sha.update(np.array(parent_cfg.get_cell()).tobytes())
+    sha.update(parent_cfg.get_atomic_numbers().astype(np.int64).tobytes())
+    sha.update(parent_cfg.get_scaled_positions().tobytes())
+    key = sha.hexdigest()
+    if key not in engines:
+        engines[key] = DegeneracyEngine(parent_cfg, threshold, species=species)
+    return engines[key]
+
+def composition_label(composition):
+    """Short label of a composition from DegeneracyEngine.composition, e.g. 'Co2Mn6|Co16' (sublattices separated by '|')"""
+    return '|'.join(''.join(chemical_symbols[number]+str(count) for number, count in sublattice) for sublattice in composition)
+
+def sampled_method(rel_tol):
+    """Label used for results of sampling in the result cache (early stopping changes the result, so is part of the label)"""
+    return 'sampled' if (rel_tol == 0) else 'sampled(rel_tol='+repr(float(rel_tol))+')'
+
+def estimate_costs(engine, ase_cell_orig, scaling, rel_tol, num_proc, calibration):
+    """Predicted number of trials, runtime and memory of each strategy for a single config
+
+    Args:
+        engine (DegeneracyEngine): Engine for the parent of the config
+        ase_cell_orig (ase Atoms object): Original config
+        scaling (int): Upper limit of random configs for 'sampled' is (combinations-1)*scaling
+        rel_tol (float): 'sampled' stops early once the relative standard error of the degeneracy is below this (0 to never stop early)
+        num_proc (int): Number of processors used for 'sampled'
+        calibration (dictionary): Measured seconds per trial, keyed by parent and composition, updated in place
+
+    Returns:
+        dictionary: For each strategy, dictionary with 'trials', 'seconds' and 'bytes'
+    """
+    sub_atoms = engine.sub_atoms(ase_cell_orig)
+    composition = engine.composition(ase_cell_orig)
+    combinations = engine.composition_data(composition)['combinations']
+    symm_op_count, site_count = engine.perm_table.shape # Only substitutable sites are compared
+    orig_images = pk.orbit_images(sub_atoms, engine.perm_table)
+    image_bytes = orig_images.nbytes
+
+    # 'exact' is cheap enough to time directly
+    t0 = time.time()
+    np.unique(orig_images, axis=0)
+    costs = {'exact': {'trials': symm_op_count, 'seconds': time.time()-t0, 'bytes': 3*image_bytes}}
+
+    # Cost per random config depends on how soon a match is found, so is measured once for each parent and composition
+    calibration_key = (id(engine), composition)
+    if calibration_key not in calibration:
+        pk.count_equiv_perm(orig_images[:1], sub_atoms[np.newaxis, :]) # Import and compile the numba kernel (on first use) before timing
+        t0 = time.time()
+        engine.count_sampled(sub_atoms, orig_images, CALIBRATION_TRIALS, np.random.SeedSequence(0))
+        calibration[calibration_key] = (time.time()-t0)/CALIBRATION_TRIALS
+    trial_cost = calibration[calibration_key]
+    # Comparisons are done in chunks of 256 configs when numba is not available
+    check_bytes = site_count if pk.HAVE_NUMBA else 256*image_bytes
+
+    if (combinations <= MAX_ENUMERATE):
+        # Configs are checked in batches of every arrangement of the sublattice with the most arrangements
+        max_arrangements = max(mt.calc_multinomial([count for number, count in sublattice]) for sublattice in composition)
+        costs['enumerate'] = {'trials': combinations, 'seconds': combinations*trial_cost,
+                              'bytes': image_bytes + 2*max_arrangements*site_count + check_bytes}
+
+    # Expected fraction of random configs that are equivalent, assuming the orbit is as large as it can be
+    budget = int((combinations-1)*scaling)
+    orbit_guess = min(symm_op_count, combinations)
+    p_guess = float(orbit_guess-1)/float(combinations-1)
+    if (rel_tol > 0 and p_guess > 0):
+        trials = min(budget, max(dc.SAMPLING_ROUND, int(math.ceil((1.0-p_guess)/(p_guess*rel_tol**2)))))
+    else:
+        trials = budget
+    shared_bytes = image_bytes + sub_atoms.nbytes + engine.sublattice_bounds.nbytes # Arrays shared with the workers
+    costs['sampled'] = {'trials': trials, 'seconds': trials*trial_cost/num_proc,
+                        'bytes': shared_bytes + num_proc*(engine.batch_size*site_count + check_bytes)}
+    return costs
+
+def plan_data_list(all_set_locs, threshold, scaling, strategies=STRATEGIES, rel_tol=0.0, num_proc=1, cache=None, alloy_species=('Co', 'Mn')):
+    """Reads every config in a data list and chooses how its symmetry degeneracy will be computed
+    The allowed strategy with the lowest predicted runtime is chosen, end-members and configs found in the cache need no work
+
+    Args:
+        all_set_locs (list): Directories containing 'POSCAR_orig' for each config
+        threshold (float): Tolerance used by spglib to identify spacegroup
+        scaling (int): Upper limit of random configs for 'sampled' is (combinations-1)*scaling
+        strategies (list): Strategies that may be chosen, from STRATEGIES
+        rel_tol (float): 'sampled' stops early once the relative standard error of the degeneracy is below this (0 to never stop early)
+        num_proc (int): Number of processors used for 'sampled'
+        cache (result_cache.ResultCache): Optional store of previous results
+        alloy_species (list): Species that substitute for each other, the parent of each config has all of them replaced by the first
+
+    Returns:
+        list: Dictionary for each config with keys 'cfg_inpt', 'strategy', 'seconds' and 'bytes' (plus details used to run it)
+        'strategy' is 'end-member', 'cached', one of STRATEGIES, or 'error' if the config could not be planned
+    """
+    engines = {}
+    calibration = {}
+    plans = []
+    for loc in all_set_locs:
+        cfg_inpt = loc.rstrip()
+        plan = {'cfg_inpt': cfg_inpt, 'strategy': 'error', 'seconds': 0.0, 'bytes': 0}
+        plans.append(plan)
+        try:
+            ase_cell_orig = ase.io.read(os.path.join(cfg_inpt, 'POSCAR_orig'), format='vasp')
+            parent_cfg = mt.de_colour(ase_cell_orig, alloy_species[0], alloy_species)
+            engine = get_engine(engines, parent_cfg, threshold, [alloy_species[0]])
+            composition = engine.composition(ase_cell_orig)
+            combinations = engine.composition_data(composition)['combinations']
+            plan.update({'ase_cell_orig': ase_cell_orig, 'engine': engine, 'composition': composition,
+                         'combinations': combinations, 'symm_op_count': engine.symm_op_count})
+            # First check that config is not an end-member of the alloy
+            if (combinations == 1):
+                plan['strategy'] = 'end-member'
+                continue
+            costs = estimate_costs(engine, ase_cell_orig, scaling, rel_tol, num_proc, calibration)
+            plan['costs'] = costs
+            if cache is not None:
+                config_fp, parent_fp = engine.config_fp(engine.orbit_images(ase_cell_orig))
+                # 'exact' and 'enumerate' give the same result, so share one entry in the cache
+                plan['cache_keys'] = {'exact': (config_fp, parent_fp, threshold, 'exact', 0),
+                                      'sampled': (config_fp, parent_fp, threshold, sampled_method(rel_tol), scaling)}
+                for method in ('exact', 'sampled'):
+                    if (method in strategies or (method == 'exact' and 'enumerate' in strategies)):
+                        cached_result = cache.get(*plan['cache_keys'][method])
+                        if cached_result is not None:
+                            plan.update({'strategy': 'cached', 'result': cached_result})
+                            break
+                if (plan['strategy'] == 'cached'):
+                    continue
+            allowed = [strategy for strategy in strategies if strategy in costs]
+            if not allowed:
+                print('Error in planning config from: '+cfg_inpt+', none of '+str(list(strategies))+' are possible')
+                continue
+            strategy = min(allowed, key=lambda strategy: costs[strategy]['seconds'])
+            plan.update({'strategy': strategy, 'trials': costs[strategy]['trials'],
+                         'seconds': costs[strategy]['seconds'], 'bytes': costs[strategy]['bytes']})
+        except Exception:
+            print('Error in planning config from: '+cfg_inpt)
+    return plans
+
+def print_plan(plans, num_proc):
+    """Prints chosen strategy and predicted cost of each config, followed by predicted total runtime and peak memory
+
+    Args:
+        plans (list): Output of plan_data_list
+        num_proc (int): Number of processors used for 'sampled'
+    """
+    labels = set()
+    print('{0:<40s} {1:<24s}{2:>14s}{3:>6s}{4:>12s}{5:>14s}{6:>12s}{7:>12s}'.format(
+        'Config', 'Composition', 'Combinations', 'Ops', 'Strategy', 'Trials', 'Time (s)', 'Memory (MB)'))
+    for plan in plans:
+        if (plan['strategy'] == 'error'):
+            print('{0:<40s}{1:>83s}'.format(plan['cfg_inpt'][-40:], 'error'))
+            continue
+        labels.add(' | '.join(plan['engine'].sublattices))
+        print('{0:<40s} {1:<24s}{2:>14d}{3:>6d}{4:>12s}{5:>14d}{6:>12.3g}{7:>12.3g}'.format(
+            plan['cfg_inpt'][-40:], composition_label(plan['composition']), plan['combinations'], plan['symm_op_count'],
+            plan['strategy'], plan.get('trials', 0), plan['seconds'], plan['bytes']/1e6))
+    for label in sorted(labels):
+        print('Sublattices (Composition order): '+label)
+    counts = {}
+    for plan in plans:
+        counts[plan['strategy']] = counts.get(plan['strategy'], 0) + 1
+    print('Strategies: '+', '.join(strategy+': '+str(count) for strategy, count in counts.items()))
+    print('Predicted total runtime: {0:.3g} secs on {1} processors'.format(sum(plan['seconds'] for plan in plans), num_proc))
+    print('Predicted peak memory: {0:.3g} MB'.format(max([plan['bytes'] for plan in plans] + [0])/1e6))
@@ -1,73 +1,72 @@
-import ase
-import ase.io
-from ase import Atoms
-import numpy as np
-import os
 import time
+import sys
+import argparse
 import multiprocessing as mp
-# Ensuring correct version of spglib is imported
-try:
-    import spglib as spg
-except ImportError:
-    from pyspglib import spglib as spg
+from functools import partial
+import numpy as np
 # Custom-made functions for workflow
+# Worker processes started with 'spawn' or 'forkserver' re-import this file, so only modules they need are imported here
+# Modules depending on ase and spglib (planner, degeneracy_engine, misc_tools) are imported by the main process under __main__ below
 #import symm_ops as so
 #import visualisation_tools as vt
-import config_equivalence as ce
-import misc_tools as mt
+#import config_equivalence as ce
+import degen_core as dc
+import sampling as sm
+import shared_state as ss
+import result_cache as rc
+import info_columns as ic
 
 
-def create_and_check_rand_async(i, td_atoms, oh_atoms, ox_atoms, orig_cell, orig_coords, symm_ops, symm_op_count, ase_cell_orig):
-    """Workflow made into a function for compatibility with 'pool.apply_async'.
-    Actions of workflow:
-    - Creates random shuffles amongst lists of td and oh atoms in (i.e. substitutions in the alloy)
-    - Uses this and data from the ase Atoms object of the original config to create a new ase Atoms object (rand_cfg)
-    - Calls the function isEquiv to apply all symmetry operations of the parent config to the random structure, returns True if a match is found
+def sample_degeneracy(pool, num_proc, engine, ase_cell_orig, combinations, scaling, rel_tol, seed_seq):
+    """Estimates symmetry degeneracy of a config from random substitutions, tested in parallel on the pool
 
-    Args:
-        i (int): Iterator from pool.apply_async, number of times to create and test a random config
-        td_atoms (list): List of atomic numbers for atoms on the td sites in the original config
-        oh_atoms (list): List of atomic numbers for atoms on the oh sites in the original config
-        ox_atoms (list): List of atomic numbers of the oxygen atoms in the original config
-        orig_cell (np array): Lattice vectors from ase Atoms object of original config (object.get_cell)
-        orig_coords (np array): Fractional atomic positions from ase Atoms object of original config (object.get_scaled_positions())
-        symm_ops (dictionary): Dictionary of translational and rotational symmetry operations of the parent config from spglib
-        symm_op_count (int): Total number of symmetry operations for parent config
-        ase_cell_orig (ase Atoms object): Ase Atoms object of the original config
-
-    Returns:
-        int: 0 if no matches are found 1 if any matches are found
-    """
-    degeneracy_count = 0
-    # Randomly shuffle lists of td and oh atoms
-    td_shuf = np.random.choice(td_atoms, size=td_atoms.shape)
-    oh_shuf = np.random.choice(oh_atoms, size=oh_atoms.shape)
-    #if (td_atoms.tolist() == td_shuf.tolist()) and (oh_atoms.tolist() == oh_shuf.tolist()):
-    #    print('Same!')
-    # Keep re-shuffling if random config is the same as the initial
-    while ((td_atoms.tolist() == td_shuf.tolist()) and (oh_atoms.tolist() == oh_shuf.tolist())):
-        td_shuf = np.random.choice(td_atoms, size=td_atoms.shape)
-        oh_shuf = np.random.choice(oh_atoms, size=oh_atoms.shape)
-    all_atoms_shuf = np.concatenate((td_shuf, oh_shuf, ox_atoms), axis=0)
-    # Create rand_cfg ase Atoms object with orig cfg coords and shuffled td and oh atomic numbers
-    rand_cfg = Atoms(cell=orig_cell, scaled_positions=orig_coords, pbc=True)
-    rand_cfg.set_atomic_numbers(all_atoms_shuf)
-    isEquiv = ce.check_for_equiv(symm_ops, symm_op_count, ase_cell_orig, rand_cfg)
-    if isEquiv:
-        degeneracy_count += 1
-    return degeneracy_count
-
-def collect_result(result):
-    """Collecting results from async parallel processors
+    Up to (combinations-1)*scaling random configs are tested, in blocks of sampling.BLOCK_SIZE that each have their own random stream
+    (block i is seeded from the i-th child of seed_seq), so the estimate only depends on seed_seq and not on num_proc.
+    Blocks are tested in rounds so that sampling can stop once the estimate has converged, which is checked every dc.SAMPLING_ROUND configs.
+    The degeneracy is estimated as 1 + (fraction of random configs that are equivalent)*(combinations-1),
+    which is the number of matches divided by scaling plus 1 when all random configs are tested.
 
     Args:
-        result: takes result from 'pool.apply_async'
+        pool (multiprocessing Pool): Pool of worker processes
+        num_proc (int): Number of processes in the pool
+        engine (DegeneracyEngine): Engine for the parent of the config (supplies symmetry ops, sublattices and permutation table)
+        ase_cell_orig (ase Atoms object): Original config
+        combinations (int): Total number of combinations for the composition of the config
+        scaling (int): scaling*total_combinations for random sampling of each config when searching for degeneracy
+        rel_tol (float): Stop once the relative standard error of the degeneracy is below this (0 to always test all random configs)
+        seed_seq (numpy SeedSequence): Seed sequence for the config, see sampling.config_seeds
 
     Returns:
-        Appends results from each sync process and outputs list of results to a global (defined in main as empty list)
+        float: Estimated symmetry degeneracy
     """
-    global mp_results
-    mp_results.append(result)
+    attempts = int((combinations-1)*scaling) # Subtract from from total combinations to discount same arrangement of atoms as in orig config
+    # Read-only arrays are placed in shared memory once per config, workers attach to them instead of receiving pickled copies
+    # Only the arrays used by dc.create_and_check_rand_async are shared
+    shared_arrays = {'orig_images': engine.orbit_images(ase_cell_orig), 'sub_atoms': engine.sub_atoms(ase_cell_orig),
+                     'sublattice_bounds': engine.sublattice_bounds}
+    # Rounds hold enough blocks to keep every processor busy, convergence is still checked every SAMPLING_ROUND configs (in order)
+    round_size = dc.SAMPLING_ROUND*(-(-num_proc*sm.BLOCK_SIZE//dc.SAMPLING_ROUND))
+    if (rel_tol == 0):
+        round_size *= 100 # No convergence checks, rounds only limit the number of tasks queued at once
+    degeneracy_count = 0
+    tested = 0
+    converged = False
+    with ss.SharedArrays(shared_arrays) as shared:
+        task = partial(dc.create_and_check_rand_async, shared_handle=shared.handle)
+        while (tested < attempts and not converged):
+            sizes = sm.block_sizes(min(round_size, attempts-tested))
+            # Collect together results from all processors, in order of the blocks (block is only released once all have finished)
+            counts = pool.map(task, zip(seed_seq.spawn(len(sizes)), sizes), chunksize=max(1, len(sizes)//(4*num_proc)))
+            for size, count in zip(sizes, counts):
+                degeneracy_count += count
+                tested += size
+                # Relative standard error of the fraction of random configs that are equivalent
+                if (rel_tol > 0 and degeneracy_count > 0 and tested % dc.SAMPLING_ROUND == 0):
+                    frac = float(degeneracy_count)/float(tested)
+                    if (np.sqrt((1.0-frac)/(tested*frac)) < rel_tol):
+                        converged = True
+                        break
+    return 1 + float(degeneracy_count)/float(tested)*(combinations-1) if tested > 0 else 1.0
 
 
 if __name__=='__main__':
@@ -76,112 +75,112 @@ if __name__=='__main__':
     threshold = 1e-3 # Tolerance used by spglib to identify spacegroup
     scaling = 100 # scaling*total_combinations for random sampling of each config when searching for degeneracy
     data_locs = 'data/set_B.dat' # File where each line is location of all original (unrelaxed) POSCARs to be analysed
-    struc_type = 'B' # 'A' when td sites fill first or 'B' when oh sites fill first
     inpt_file = 'data/setB_all.info' # Data file outputted from first processing step of workflow
     output_file = 'data/setB_all+degen.info' # New file to combine info from file above and that from this step of the worflow
+    columns_dir = 'data/setB_all.cols' # Columnar copy of inpt_file that symm_degen_frac is appended to, created if needed (None to disable)
+    cache_file = 'data/degeneracy_cache.sqlite' # Store of results from previous runs, shared by all data lists (None to disable)
+    strategies = ['exact', 'enumerate', 'sampled'] # Strategies the planner may choose from for each config (lowest predicted runtime is used)
+    rel_tol = 0.0 # Sampling stops once relative standard error of degeneracy is below this (0 to always test scaling*total_combinations)
+    seed = 0 # Seed for the random configs of 'sampled', results are reproducible for the same seed whatever num_proc (None for a new seed each run)
+    alloy_species = ['Co', 'Mn'] # Species that substitute for each other on the sublattices of the parent (any number, e.g. ['Co', 'Mn', 'Fe'])
     ### END OF INPUTS
 
+    import planner as pl
+
+    parser = argparse.ArgumentParser(description='Symmetry degeneracy of each config in a data list')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the plan (strategy, predicted runtime and memory for each config)')
+    parser.add_argument('--num-proc', type=int, help='Number of processors to use (asked for if not given)')
+    args = parser.parse_args()
+
     # Check available number of processes for parallelisation and let user set num to use
     print("Number of processors: ", mp.cpu_count())
-    num_proc = int(input("Choose number of processors to use (<= number above): "))
-    pool = mp.Pool(num_proc)
-    mp_results = [] # Set global list to collect results from async 
+    if args.num_proc is not None:
+        num_proc = args.num_proc
+    elif args.dry_run:
+        num_proc = mp.cpu_count()
+    else:
+        num_proc = int(input("Choose number of processors to use (<= number above): "))
+    cache = rc.ResultCache(cache_file, read_only=args.dry_run) if cache_file else None # Dry runs only look up previous results
 
     # Start the timer!
     t1 = time.time()
-     
+
     with open(data_locs) as f:
-        all_set_locs = f.readlines()      
-    
+        all_set_locs = f.readlines()
+
+    ### Plan: read in each config, create parent (here choice to 'de-colour' original config so all alloy species are the first one),
+    ### obtain symmetry operations and sublattices of parent (once for each distinct parent) and choose the cheapest strategy for computing its symmetry degeneracy
+    plans = pl.plan_data_list(all_set_locs, threshold, scaling, strategies, rel_tol, num_proc, cache, alloy_species)
+    print('')
+    pl.print_plan(plans, num_proc)
+    print('It took {0} secs to plan the dataset'.format((time.time()-t1)))
+    print('')
+    if args.dry_run:
+        sys.exit(0)
+
+    ss.install_cleanup_handlers() # Remove shared memory blocks even if the job is killed
+    pool = mp.Pool(num_proc, initializer=dc.init_worker) if 'sampled' in [plan['strategy'] for plan in plans] else None
+
     all_degen_counts = []
-    for loc in all_set_locs:
-        cfg_inpt = loc.rstrip()
-
-        try:  
-            print('Analysing: '+cfg_inpt) 
-            ### Step 0: Read in orig config with ase (here it is an unrelaxed POSCAR from CASM that has been re-formatted to be readable by ase)
-            orig_cfg = os.path.join(cfg_inpt, 'POSCAR_orig')
-            ase_cell_orig = ase.io.read(orig_cfg, format='vasp')
-
-            ### Step 1: Create parent (here choice to 'de-colour' original config so all TM's are Co )
-            parent_cfg = mt.de_colour(ase_cell_orig, 'Co')
-
-            ### Step 2: Obtain symmetry operations of parent
-            spglib_cell = mt.get_spglib_from_ase(parent_cfg)
-            symm_ops = spg.get_symmetry(spglib_cell, threshold)
-            tot_symm_ops = [(r, t) for r, t in zip(symm_ops['rotations'], symm_ops['translations'])]
-            symm_op_count = len(tot_symm_ops)
-
-            ### Step 3a: Generate random substitutions of original config (respecting if cfg is A- or B-type)
-            ### Step 3b: For each random cfg (one-at-a-time), apply all symm ops of parent and check for equivalence with orig cfg
-
-            # Assigning count of Co_td and Co_oh based on if structure is set A or set B
-            Co_count = ase_cell_orig.get_chemical_symbols().count('Co')
-            # First check that config is not an end-member of the alloy
-            if (Co_count == 0 or Co_count == 24):
+    seed_seqs = sm.config_seeds(seed, len(plans)) # One independent random stream for each config of the data list
+    for plan, seed_seq in zip(plans, seed_seqs):
+        cfg_inpt = plan['cfg_inpt']
+        strategy = plan['strategy']
+
+        try:
+            print('Analysing: '+cfg_inpt)
+            if (strategy == 'error'):
+                raise ValueError('Config could not be planned')
+            if (strategy == 'end-member'):
                 all_degen_counts.append(1)
                 print('Symmetry degeneracy of alloy end-member is just 1.')
                 continue # Move on to next config in data list, don't waste time with the rest of the analysis!
+            if (strategy == 'cached'):
+                degeneracy_frac = plan['result']
+                print('Found result of a previous run in '+str(cache_file))
             else:
-                if (struc_type == 'A'):
-                    if (Co_count <= 8):
-                        Co_td = Co_count
-                        Co_oh = 0
-                    elif (Co_count > 8):
-                        Co_td = 8
-                        Co_oh = Co_count - 8
-                    else:
-                        print('Error in checking Co_count')
-                elif (struc_type == 'B'):
-                    if (Co_count <= 16):
-                        Co_oh = Co_count
-                        Co_td = 0
-                    elif (Co_count > 16):
-                        Co_oh = 16
-                        Co_td = Co_count - 16
-                    else:
-                        print('Error in checking Co_count')
+                engine = plan['engine']
+                ase_cell_orig = plan['ase_cell_orig']
+                ### Exact: count distinct configs obtained by applying all symm ops of parent to orig cfg (or check every possible substitution)
+                if (strategy in ('exact', 'enumerate')):
+                    engine.method = strategy
+                    degeneracy_frac = engine.degeneracy(ase_cell_orig)
+                ### Sampled: generate random substitutions of orig cfg and apply all symm ops of parent to check for equivalence with orig cfg
                 else:
-                    print('Error checking if struc is set A or set B')
-
-                # Generating random substitutions of orig cfg and checking for symm degeneracy with orig cfg
-                orig_coords = ase_cell_orig.get_scaled_positions()
-                orig_cell = ase_cell_orig.get_cell()
-                all_atoms = ase_cell_orig.get_atomic_numbers()
-                td_atoms = all_atoms[0:8]
-                oh_atoms = all_atoms[8:24]
-                ox_atoms = all_atoms[24:56]
-                # Set attempts to be scaling*combination space (latter based on Co_td and Co_oh counts)
-                # Intention of scaling is to increase likelihood that each possible substitution is sampled
-                combinations = mt.calc_combs(Co_td, Co_oh)
-                attempts = int((combinations-1)*scaling) # Subtract from from total combinations to discount same arrangement of atoms as in orig config
-                #attempts = 10 # reduce just for test phase
-                #orig_atom_list = ce.atom_nums_with_coords_pdSorted(ase_cell) # Use when testing method with coord sorting
-                # Timing comparison of configs run in parallel
-                #t0 = time.time()
-                for i in range(attempts):
-                    pool.apply_async(create_and_check_rand_async, args=(i, td_atoms, oh_atoms, ox_atoms, orig_cell, orig_coords, symm_ops, symm_op_count, ase_cell_orig), callback=collect_result)
-                #print('We compared '+str(attempts)+' configs')
-                #print('It took {0} secs to compare cfgs'.format((time.time()-t0)))
-                
-                # Collect together results from all processors
-                degeneracy_frac = float(sum(mp_results))/float(scaling) +1 # Divide by scaling of total combinations to average out excess, add 1 because all configs have symm degen of self
-        except:
+                    degeneracy_frac = sample_degeneracy(pool, num_proc, engine, ase_cell_orig, plan['combinations'], scaling, rel_tol, seed_seq)
+                if cache is not None:
+                    cache.put(*plan['cache_keys']['sampled' if strategy == 'sampled' else 'exact'], degeneracy_frac)
+                    cache.commit()
+        except Exception:
             print('Error in processing config from: '+str(cfg_inpt))
+            all_degen_counts.append(np.nan) # Keep one value per config, so later configs stay on the right row
         else: # If no errors in code above, add data to final degeneracy fractions list
-            all_degen_counts.append(degeneracy_frac)      
-            print('Scaled degeneracy count: '+str(degeneracy_frac)+', with: '+str(combinations)+' possible combinations.')
+            all_degen_counts.append(degeneracy_frac)
+            print('Scaled degeneracy count: '+str(degeneracy_frac)+', with: '+str(plan['combinations'])+' possible combinations ('+strategy+').')
 
-    pool.close() # Close after all files have been analysed
-    pool.join() # Prevents next lines of code from being executed before all processors have finised
+    if pool is not None:
+        pool.close() # Close after all files have been analysed
+        pool.join() # Prevents next lines of code from being executed before all processors have finised
+    if cache is not None:
+        cache.close()
 
-    ### Step 4: Add all_degen_counts list as extra column in .info files for setA or setB
+    ### Add all_degen_counts list as extra column in .info files for setA or setB
     with open(inpt_file, 'r') as f_in:
         with open(output_file, 'w') as f_out:
             lines = f_in.readlines()
             f_out.write(lines[0].rstrip()+', symm_degen_frac\n')
             for line, symm_degen in zip(range(1, len(lines)), all_degen_counts):
                 f_out.write(lines[line].rstrip()+' '+str(symm_degen)+'\n')
-    
+
+    ### Add all_degen_counts list as extra column in columnar copy of .info file, existing columns are not rewritten
+    if columns_dir is not None:
+        # Columnar copy is rebuilt if inpt_file has changed since it was made (e.g. new columns or rows)
+        if not ic.columns_match_info(columns_dir, inpt_file, added_columns=['symm_degen_frac']):
+            ic.info_to_columns(inpt_file, columns_dir)
+        try:
+            ic.append_column(columns_dir, 'symm_degen_frac', all_degen_counts, replace=True)
+        except ValueError as e:
+            print('Error in adding column to '+columns_dir+': '+str(e))
+
     print('')
     print('It took {0} secs to process the dataset'.format((time.time()-t1)))
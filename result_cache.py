@@ -0,0 +1,117 @@
+# Persistent store of symmetry degeneracy results, shared between data lists, directories and runs
+
+import os
+import hashlib
+import sqlite3
+import numpy as np
+
+
+def parent_fingerprint(parent_cfg, decimals=3):
+    """Fingerprint of a parent structure that does not depend on the order in which its atoms are listed
+
+    Args:
+        parent_cfg (ase Atoms object): Parent structure (e.g. from misc_tools.de_colour)
+        decimals (int): Lattice vectors (Angstrom) and fractional coords are rounded to this many decimal places
+
+    Returns:
+        str: Hex digest of the parent
+        np array: Canonical order of the sites, used by config_fingerprint
+    """
+    numbers = parent_cfg.get_atomic_numbers()
+    positions = np.round(parent_cfg.get_scaled_positions() % 1.0, decimals) % 1.0
+    site_order = np.lexsort((positions[:, 2], positions[:, 1], positions[:, 0], numbers))
+    sha = hashlib.sha256()
+    sha.update(np.round(np.array(parent_cfg.get_cell()), decimals).astype(np.float64).tobytes())
+    sha.update(numbers[site_order].astype(np.int64).tobytes())
+    sha.update(positions[site_order].astype(np.float64).tobytes())
+    return sha.hexdigest(), site_order
+
+def config_fingerprint(orig_images, site_order):
+    """Fingerprint of a coloured config that is the same for all configs related by a symmetry operation of the parent
+    The smallest (lexicographically) of the config's images, with sites in the canonical order of the parent, is hashed
+
+    Args:
+        orig_images (np array): Config after each symmetry operation of the parent (perm_kernels.orbit_images)
+        site_order (np array): Canonical order of the sites from parent_fingerprint
+
+    Returns:
+        str: Hex digest of the config
+    """
+    images = np.asarray(orig_images)[:, site_order]
+    first = np.lexsort(images.T[::-1])[0]
+    return hashlib.sha256(images[first].astype(np.uint8).tobytes()).hexdigest()
+
+
+class ResultCache:
+    """SQLite store of symmetry degeneracies, keyed by config and parent fingerprints, spglib threshold and method
+    Can be used as a context manager, results are committed on exit (or by calling commit)
+
+    Args:
+        path (str): Location of the SQLite database, created if it does not exist (unless read_only)
+        read_only (bool): Only look up results, the database is not created or changed (a missing database is treated as empty)
+    """
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        if (read_only and os.path.exists(path)):
+            self._conn = sqlite3.connect('file:'+path+'?mode=ro', uri=True, timeout=60)
+            return
+        self._conn = sqlite3.connect(':memory:' if read_only else path, timeout=60)
+        if not read_only:
+            self._conn.execute('PRAGMA journal_mode=WAL') # Allow runs on other data lists to read while this one writes
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS degeneracy (
+                                  config TEXT NOT NULL,
+                                  parent TEXT NOT NULL,
+                                  threshold TEXT NOT NULL,
+                                  method TEXT NOT NULL,
+                                  scaling INTEGER NOT NULL,
+                                  degeneracy REAL NOT NULL,
+                                  PRIMARY KEY (config, parent, threshold, method, scaling))''')
+        self._conn.commit()
+
+    @staticmethod
+    def _key(config_fp, parent_fp, threshold, method, scaling):
+        # 'enumerate' gives the same result as 'exact' so shares its entry, exact results do not depend on scaling,
+        # threshold is stored as text to avoid comparing floats
+        if (method == 'enumerate'):
+            method = 'exact'
+        return (config_fp, parent_fp, repr(float(threshold)), method, int(scaling) if method != 'exact' else 0)
+
+    def get(self, config_fp, parent_fp, threshold, method, scaling=0):
+        """Look up a previously stored result
+
+        Args:
+            config_fp (str): Output of config_fingerprint
+            parent_fp (str): Output of parent_fingerprint
+            threshold (float): Tolerance used by spglib to identify spacegroup
+            method (str): 'exact', 'enumerate' (stored as 'exact') or 'sampled'
+            scaling (int): Scaling used when method is 'sampled' (ignored for 'exact' and 'enumerate')
+
+        Returns:
+            float: Symmetry degeneracy, None if the config has not been analysed with these settings
+        """
+        row = self._conn.execute('SELECT degeneracy FROM degeneracy WHERE config=? AND parent=? AND threshold=? AND method=? AND scaling=?',
+                                 self._key(config_fp, parent_fp, threshold, method, scaling)).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, config_fp, parent_fp, threshold, method, scaling, degeneracy):
+        """Store a result, replacing any previous result with the same key (see get for Args)"""
+        if self.read_only:
+            raise ValueError('Error in storing result, '+self.path+' is opened read-only')
+        self._conn.execute('INSERT OR REPLACE INTO degeneracy VALUES (?, ?, ?, ?, ?, ?)',
+                           self._key(config_fp, parent_fp, threshold, method, scaling) + (float(degeneracy),))
+
+    def commit(self):
+        """Write stored results to disk"""
+        self._conn.commit()
+
+    def close(self):
+        """Commit and close the database"""
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,58 @@
+# Methods for generating random substitutions in the alloy, in blocks with independent and reproducible random streams
+# Depends only on NumPy, as it is used by worker processes (see degen_core)
+
+import numpy as np
+
+
+BLOCK_SIZE = 1000 # Random configs generated (with one random stream) per task
+
+
+def block_sizes(attempts, block_size=BLOCK_SIZE):
+    """Splits a number of random configs into blocks, all of block_size except the last
+
+    Args:
+        attempts (int): Total number of random configs
+        block_size (int): Random configs per block
+
+    Returns:
+        list: Number of random configs in each block
+    """
+    sizes = [block_size]*(attempts//block_size)
+    if (attempts % block_size):
+        sizes.append(attempts % block_size)
+    return sizes
+
+def config_seeds(seed, config_count):
+    """Independent seed sequence for each config of a data list, all derived from one seed
+
+    Args:
+        seed (int): Seed for the whole run (None to use fresh entropy from the OS, so runs are not reproducible)
+        config_count (int): Number of configs
+
+    Returns:
+        list: numpy SeedSequence for each config, block i of a config is seeded from its i-th spawned child
+    """
+    return np.random.SeedSequence(seed).spawn(config_count)
+
+def random_colourings(rng, sub_atoms, sublattice_bounds, size):
+    """Block of random configs, each a random permutation of the atoms of every sublattice of the original config
+    Configs that are the same as the original config are drawn again, as the original config is always counted once
+
+    Args:
+        rng (numpy Generator): Random stream, e.g. np.random.default_rng(seed_sequence)
+        sub_atoms (np array): Atomic numbers of the original config on the substitutable sites, sublattice by sublattice
+        sublattice_bounds (np array): Sublattice i is sub_atoms[sublattice_bounds[i]:sublattice_bounds[i+1]]
+        size (int): Number of random configs
+
+    Returns:
+        np array: uint8 array of shape (size, number of substitutable sites)
+    """
+    sub_atoms = np.asarray(sub_atoms, dtype=np.uint8)
+    rand_cfgs = np.tile(sub_atoms, (size, 1))
+    # Every row is permuted independently within each sublattice in one call, then any rows equal to the original are redone
+    redo = np.arange(size)
+    while len(redo) > 0:
+        for (first, last) in zip(sublattice_bounds[:-1], sublattice_bounds[1:]):
+            rand_cfgs[redo, first:last] = rng.permuted(rand_cfgs[redo, first:last], axis=1)
+        redo = redo[np.all(rand_cfgs[redo] == sub_atoms, axis=1)]
+    return rand_cfgs
@@ -0,0 +1,121 @@
+# Methods for sharing read-only arrays (e.g. the images of a config under the symmetry operations of its parent) between processes without copying
+
+import os
+import sys
+import atexit
+import signal
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+
+
+_ALIGN = 64 # Byte alignment of each array within a shared memory block
+_owned = {} # Blocks created by this process that have not been released yet, name: SharedArrays
+_attached = {} # Blocks attached to by this (worker) process, name: (SharedMemory, dictionary of arrays)
+_owner_pid = None # Process that installed the cleanup handlers
+
+
+class SharedArrays:
+    """Copies a dictionary of arrays into a single shared memory block, for use as a context manager in the main process
+    Workers are passed the small, picklable 'handle' and call attach(handle) to get read-only views of the arrays without copying
+
+    Args:
+        arrays (dictionary): Arrays to share, keys are used to look them up again after attaching
+    """
+    def __init__(self, arrays):
+        arrays = {key: np.ascontiguousarray(value) for key, value in arrays.items()}
+        layout = []
+        offset = 0
+        for key, array in arrays.items():
+            layout.append((key, array.dtype.str, array.shape, offset))
+            offset += -(-array.nbytes//_ALIGN)*_ALIGN
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (key, dtype, shape, offset) in layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)
+            view[...] = arrays[key]
+            del view
+        self.handle = (self._shm.name, tuple(layout))
+        _owned[self._shm.name] = self
+
+    def release(self):
+        """Closes and removes the shared memory block, safe to call more than once"""
+        if (_owned.pop(self._shm.name, None) is None):
+            return
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def attach(handle):
+    """Attaches to a shared memory block created by SharedArrays, repeat calls with the same handle reuse the first attachment
+    Attachments to any other blocks are closed, as the main process only keeps one block per config alive at a time
+
+    Args:
+        handle (tuple): SharedArrays.handle from the main process
+
+    Returns:
+        dictionary: Read-only views of the shared arrays
+    """
+    name, layout = handle
+    if name in _attached:
+        return _attached[name][1]
+    for old_name in list(_attached):
+        _detach(old_name)
+    if (sys.version_info >= (3, 13)):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        # Workers share the resource tracker of the main process, which already tracks this block
+        shm = shared_memory.SharedMemory(name=name)
+    arrays = {}
+    for (key, dtype, shape, offset) in layout:
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        view.setflags(write=False)
+        arrays[key] = view
+    _attached[name] = (shm, arrays)
+    return arrays
+
+def _detach(name):
+    """Closes the attachment of this process to a shared memory block (does not remove the block)"""
+    shm, arrays = _attached.pop(name)
+    arrays.clear()
+    try:
+        shm.close()
+    except BufferError:
+        pass # Views of the arrays are still referenced elsewhere, block is unmapped when they are garbage collected
+
+
+def release_all():
+    """Releases every shared memory block created by this process that has not been released yet"""
+    for shared in list(_owned.values()):
+        shared.release()
+
+def _exit_on_signal(signum, frame):
+    """Turns a termination signal into SystemExit in the main process so that context managers and atexit run"""
+    if (os.getpid() != _owner_pid):
+        # Forked worker inherited this handler, terminate as if it were never installed
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+        return
+    raise SystemExit(128 + signum)
+
+def install_cleanup_handlers():
+    """Makes sure shared memory blocks are removed when the main process exits, including when the job is killed with SIGTERM or SIGHUP
+    Blocks left behind by SIGKILL are removed by the multiprocessing resource tracker (with a warning)
+    NOTE: Call before creating the pool, so that workers share the resource tracker of the main process
+    """
+    global _owner_pid
+    if (_owner_pid is not None):
+        return
+    _owner_pid = os.getpid()
+    resource_tracker.ensure_running()
+    atexit.register(release_all)
+    for signame in ['SIGTERM', 'SIGHUP']:
+        if hasattr(signal, signame):
+            signal.signal(getattr(signal, signame), _exit_on_signal)
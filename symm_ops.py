@@ -1,7 +1,5 @@
 # Methods for applying symmetry operations to ase atoms objects
 
-import ase
-import ase.io
 from ase import Atoms
 import numpy as np
 
@@ -0,0 +1,22 @@
+# Shared fixtures for the tests, run with 'python -m pytest' from the top directory of the repo
+
+import os
+import sys
+import pytest
+
+# Modules of the workflow are top-level files of the repo, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import misc_tools as mt
+from benchmarks import spinel_cell
+
+
+@pytest.fixture
+def spinel():
+    """56 atom Co_xMn_{3-x}O_4 config with 3 Co on random TM sites"""
+    return spinel_cell(Co_count=3, seed=1)
+
+@pytest.fixture
+def spinel_parent(spinel):
+    """Parent of the spinel fixture, with all TM sites Co"""
+    return mt.de_colour(spinel, 'Co')
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import misc_tools as mt
+from benchmarks import spinel_cell
+from degeneracy_engine import DegeneracyEngine, arrangements
+
+
+@pytest.mark.parametrize('Co_count, seed', [(1, 0), (2, 3), (3, 1), (4, 2), (22, 5)])
+def test_exact_matches_enumerate(Co_count, seed):
+    ase_cell = spinel_cell(Co_count=Co_count, seed=seed)
+    engine = DegeneracyEngine(mt.de_colour(ase_cell, 'Co'), species=['Co'])
+    exact = engine.degeneracy(ase_cell)
+    engine.method = 'enumerate'
+    assert engine.degeneracy(ase_cell) == exact
+
+def test_end_member_is_one(spinel_parent):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'])
+    assert engine.degeneracy(spinel_parent) == 1.0
+
+def test_config_with_other_sites_raises(spinel, spinel_parent):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'])
+    with pytest.raises(ValueError):
+        engine.degeneracy(spinel[:-1])
+
+def test_arrangements_are_distinct():
+    species = np.array([25, 25, 27, 27, 27])
+    result = arrangements(species)
+    assert len(result) == 10
+    assert len(np.unique(result, axis=0)) == 10
+    assert np.all(np.sort(result, axis=1) == np.sort(species))
+
+def test_ternary_exact_matches_enumerate():
+    ase_cell = spinel_cell(Co_count=20, seed=4)
+    ase_cell.numbers[[0, 9, 10]] = 26 # Fe on one td and two oh sites
+    engine = DegeneracyEngine(mt.de_colour(ase_cell, 'Co', ['Co', 'Mn', 'Fe']), species=['Co'])
+    exact = engine.degeneracy(ase_cell)
+    engine.method = 'enumerate'
+    assert engine.degeneracy(ase_cell) == exact
+
+@pytest.mark.parametrize('scaling', [2.5, 1e1])
+def test_sampled_non_integer_scaling(spinel, spinel_parent, scaling):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'], method='sampled', scaling=scaling, seed=0)
+    assert engine.degeneracy(spinel) > 1.0
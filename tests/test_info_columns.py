@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pytest
+import info_columns as ic
+
+
+@pytest.fixture
+def info_file(tmp_path):
+    """.info file in the format written by earlier steps of the workflow"""
+    data = np.column_stack([np.arange(6), np.arange(6)%3, np.linspace(-700, -705, 6), np.full(6, 8.1)])
+    path = str(tmp_path/'set_all.info')
+    np.savetxt(path, data, header='Co num, Co oh, E_DFT, lattvec a', comments='# ')
+    return path
+
+def test_round_trip_is_byte_identical(info_file, tmp_path):
+    cols_dir = str(tmp_path/'set_all.cols')
+    ic.info_to_columns(info_file, cols_dir)
+    ic.columns_to_info(cols_dir, str(tmp_path/'round_trip.info'))
+    with open(info_file, 'rb') as f_orig, open(str(tmp_path/'round_trip.info'), 'rb') as f_new:
+        assert f_new.read() == f_orig.read()
+
+def test_append_column(info_file, tmp_path):
+    cols_dir = str(tmp_path/'set_all.cols')
+    ic.info_to_columns(info_file, cols_dir)
+    ic.append_column(cols_dir, 'symm_degen_frac', [1, 16, 24, 96, 8, np.nan])
+    columns = ic.load_columns(cols_dir)
+    assert list(columns)[-1] == 'symm_degen_frac'
+    assert np.isnan(ic.load_column(cols_dir, 'symm_degen_frac')[-1])
+    with pytest.raises(ValueError):
+        ic.append_column(cols_dir, 'symm_degen_frac', np.ones(6))
+    with pytest.raises(ValueError):
+        ic.append_column(cols_dir, 'extra', np.ones(5))
+
+def test_columns_match_info(info_file, tmp_path):
+    cols_dir = str(tmp_path/'set_all.cols')
+    assert not ic.columns_match_info(cols_dir, info_file)
+    ic.info_to_columns(info_file, cols_dir)
+    ic.append_column(cols_dir, 'symm_degen_frac', np.ones(6))
+    assert ic.columns_match_info(cols_dir, info_file, added_columns=['symm_degen_frac'])
+    # New column added to the .info file
+    names, data = ic.read_info(info_file)
+    np.savetxt(info_file, np.column_stack([data, np.zeros(6)]), header=', '.join(names+['form_E']), comments='# ')
+    index_file = os.path.join(cols_dir, ic.INDEX_FILE)
+    os.utime(info_file, (os.path.getmtime(index_file), os.path.getmtime(index_file))) # Only the header differs
+    assert not ic.columns_match_info(cols_dir, info_file, added_columns=['symm_degen_frac'])
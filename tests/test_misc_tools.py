@@ -0,0 +1,37 @@
+import math
+import numpy as np
+import pytest
+import misc_tools as mt
+from benchmarks import spinel_cell
+
+
+def test_de_colour(spinel):
+    parent = mt.de_colour(spinel, 'Mn')
+    assert parent.get_chemical_formula() == 'Mn24O32'
+    ternary = spinel.copy()
+    ternary.numbers[:4] = 26
+    assert mt.de_colour(ternary, 'Co', ['Co', 'Mn', 'Fe']).get_chemical_formula() == 'Co24O32'
+
+def test_de_colour_unknown_species_raises(spinel):
+    with pytest.raises(ValueError):
+        mt.de_colour(spinel, 'Fe')
+
+def test_combinations_are_exact_integers():
+    assert mt.calc_combs(2, 3) == 28*560
+    assert isinstance(mt.calc_combs(2, 3), int)
+    assert mt.calc_multinomial([2, 3, 3]) == 560
+    # Too large to be exact as a float
+    counts = [[16, 16, 16], [32, 32]]
+    expected = math.factorial(48)//math.factorial(16)**3 * math.comb(64, 32)
+    assert mt.calc_sublattice_combs(counts) == expected
+
+def test_detect_sublattices(spinel_parent):
+    sublattices = mt.detect_sublattices(spinel_parent, 1e-3, ['Co'])
+    assert [len(sites) for sites in sublattices.values()] == [8, 16]
+    assert list(sublattices['Co 8b']) == list(range(0, 8))
+    assert len(mt.detect_sublattices(spinel_parent, 1e-3)) == 3
+
+def test_detect_sublattices_supercell():
+    parent = mt.de_colour(spinel_cell(repeat=(2, 1, 1)), 'Co')
+    sublattices = mt.detect_sublattices(parent, 1e-3, ['Co'])
+    assert sorted(len(sites) for sites in sublattices.values()) == [16, 32]
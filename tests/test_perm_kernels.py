@@ -0,0 +1,51 @@
+import sys
+import numpy as np
+import pytest
+import misc_tools as mt
+import perm_kernels as pk
+from degeneracy_engine import DegeneracyEngine
+
+
+@pytest.fixture
+def images_and_cfgs(spinel, spinel_parent):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'])
+    images = engine.orbit_images(spinel)
+    rng = np.random.default_rng(0)
+    cfgs = rng.permuted(np.tile(engine.sub_atoms(spinel), (300, 1)), axis=1)
+    cfgs[:20] = images[rng.integers(len(images), size=20)] # Some configs that are known to be equivalent
+    return images, cfgs
+
+def test_perm_table_is_permutation(spinel_parent):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'])
+    perm_table = engine.perm_table
+    assert perm_table.shape == (engine.symm_op_count, 24)
+    assert np.all(np.sort(perm_table, axis=1) == np.arange(24))
+
+def test_numpy_methods_agree(images_and_cfgs):
+    images, cfgs = images_and_cfgs
+    expected = sum(pk.check_for_equiv_numpy(images, cfg) for cfg in cfgs)
+    assert expected >= 20
+    assert pk.count_equiv_numpy(images, cfgs, chunk_size=7) == expected
+    assert pk.count_equiv_perm(images, cfgs) == expected
+
+@pytest.mark.skipif(not pk.HAVE_NUMBA, reason='numba is not installed')
+def test_numba_matches_numpy(images_and_cfgs):
+    images, cfgs = images_and_cfgs
+    assert pk.count_equiv_numba(images, cfgs) == pk.count_equiv_numpy(images, cfgs)
+    assert pk.check_for_equiv_numba(images, cfgs[0]) == pk.check_for_equiv_numpy(images, cfgs[0])
+
+def test_symm_perm_table_raises_for_wrong_sites(spinel_parent):
+    symm_ops = DegeneracyEngine(spinel_parent).symm_ops
+    positions = spinel_parent.get_scaled_positions()[:24] + 0.01
+    with pytest.raises(ValueError):
+        pk.symm_perm_table(positions, symm_ops)
+
+def test_falls_back_on_numpy_when_numba_import_fails(images_and_cfgs, monkeypatch):
+    images, cfgs = images_and_cfgs
+    monkeypatch.setitem(sys.modules, 'numba', None) # 'import numba' raises ImportError
+    monkeypatch.setattr(pk, 'HAVE_NUMBA', True)
+    monkeypatch.setattr(pk, '_numba_kernels', None)
+    expected = pk.count_equiv_numpy(images, cfgs)
+    assert pk.count_equiv_perm(images, cfgs) == expected
+    assert not pk.HAVE_NUMBA
+    assert pk.check_for_equiv_perm(images, cfgs[0]) == pk.check_for_equiv_numpy(images, cfgs[0])
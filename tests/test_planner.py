@@ -0,0 +1,30 @@
+import os
+import ase.io
+import planner as pl
+from benchmarks import spinel_cell
+
+
+def write_data_list(tmp_path, cells):
+    """Writes each config to 'POSCAR_orig' in its own directory, returns the locations as in a data list"""
+    locs = []
+    for i, ase_cell in enumerate(cells):
+        loc = str(tmp_path/('con'+str(i)))
+        os.makedirs(loc)
+        ase.io.write(os.path.join(loc, 'POSCAR_orig'), ase_cell, format='vasp', direct=True)
+        locs.append(loc+'\n')
+    return locs
+
+def test_plan_strategies(tmp_path, capsys):
+    cells = [spinel_cell(Co_count=0), spinel_cell(Co_count=3, seed=1), spinel_cell(Co_count=24)]
+    plans = pl.plan_data_list(write_data_list(tmp_path, cells), 1e-3, 100)
+    assert [plan['strategy'] for plan in plans[::2]] == ['end-member', 'end-member']
+    assert plans[1]['strategy'] in pl.STRATEGIES
+    pl.print_plan(plans, 1)
+    assert 'Co 8b | Co 16c' in capsys.readouterr().out
+
+def test_plan_non_integer_scaling(tmp_path, capsys):
+    plans = pl.plan_data_list(write_data_list(tmp_path, [spinel_cell(Co_count=3, seed=1)]), 1e-3, 2.5, strategies=['sampled'])
+    assert plans[0]['strategy'] == 'sampled'
+    assert isinstance(plans[0]['trials'], int)
+    pl.print_plan(plans, 1)
+    assert 'sampled' in capsys.readouterr().out
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import misc_tools as mt
+import result_cache as rc
+from degeneracy_engine import DegeneracyEngine
+
+
+def fingerprints(ase_cell):
+    """(config, parent) fingerprints of a config, with a new engine for its parent"""
+    engine = DegeneracyEngine(mt.de_colour(ase_cell, 'Co'), species=['Co'])
+    return engine.config_fp(engine.orbit_images(ase_cell))
+
+def test_fingerprint_same_for_reordered_atoms(spinel):
+    order = np.random.default_rng(0).permutation(len(spinel))
+    assert fingerprints(spinel[order]) == fingerprints(spinel)
+
+def test_fingerprint_same_after_symmetry_operation(spinel, spinel_parent):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'])
+    numbers = spinel.get_atomic_numbers()
+    sub_sites = engine.sub_sites
+    for op_num in (1, 7, len(engine.perm_table)-1):
+        # Atom on substitutable site i is moved onto site perm_table[op_num, i]
+        moved_numbers = numbers.copy()
+        moved_numbers[sub_sites[engine.perm_table[op_num]]] = numbers[sub_sites]
+        moved = spinel.copy()
+        moved.set_atomic_numbers(moved_numbers)
+        assert np.any(moved_numbers != numbers)
+        assert engine.config_fp(engine.orbit_images(moved)) == engine.config_fp(engine.orbit_images(spinel))
+
+def test_fingerprint_differs_for_inequivalent_config(spinel):
+    numbers = spinel.get_atomic_numbers()
+    other = spinel.copy()
+    other.set_atomic_numbers(np.where(np.arange(len(numbers)) < 8, 27, numbers)) # All td sites Co
+    assert fingerprints(other)[0] != fingerprints(spinel)[0]
+    assert fingerprints(other)[1] == fingerprints(spinel)[1]
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path/'cache.sqlite')
+    with rc.ResultCache(path) as cache:
+        cache.put('config', 'parent', 1e-3, 'enumerate', 100, 24.0)
+        cache.put('config', 'parent', 1e-3, 'sampled', 100, 23.5)
+    with rc.ResultCache(path, read_only=True) as cache:
+        assert cache.get('config', 'parent', 1e-3, 'exact') == 24.0
+        assert cache.get('config', 'parent', 1e-3, 'sampled', 100) == 23.5
+        assert cache.get('config', 'parent', 1e-3, 'sampled', 10) is None
+        with pytest.raises(ValueError):
+            cache.put('config', 'parent', 1e-3, 'exact', 0, 1.0)
+
+def test_read_only_cache_is_not_created(tmp_path):
+    path = tmp_path/'cache.sqlite'
+    with rc.ResultCache(str(path), read_only=True) as cache:
+        assert cache.get('config', 'parent', 1e-3, 'exact') is None
+    assert not path.exists()
@@ -0,0 +1,59 @@
+import multiprocessing as mp
+import numpy as np
+import pytest
+import degen_core as dc
+import sampling as sm
+import shared_state as ss
+from degeneracy_engine import DegeneracyEngine
+from process_dataList import sample_degeneracy
+
+
+def test_block_sizes():
+    assert sm.block_sizes(2500, 1000) == [1000, 1000, 500]
+    assert sm.block_sizes(2000, 1000) == [1000, 1000]
+    assert sm.block_sizes(0) == []
+
+def test_random_colourings():
+    sub_atoms = np.array([25, 25, 27, 25, 27, 27, 27, 25], dtype=np.uint8)
+    bounds = np.array([0, 3, 8])
+    rand_cfgs = sm.random_colourings(np.random.default_rng(0), sub_atoms, bounds, 500)
+    assert rand_cfgs.shape == (500, 8)
+    # Atoms are only permuted within each sublattice, and never back into the original config
+    for (first, last) in zip(bounds[:-1], bounds[1:]):
+        assert np.all(np.sort(rand_cfgs[:, first:last], axis=1) == np.sort(sub_atoms[first:last]))
+    assert not np.any(np.all(rand_cfgs == sub_atoms, axis=1))
+    same_seed = sm.random_colourings(np.random.default_rng(0), sub_atoms, bounds, 500)
+    assert np.array_equal(rand_cfgs, same_seed)
+
+def test_config_seeds_are_reproducible():
+    first, second = sm.config_seeds(7, 2), sm.config_seeds(7, 2)
+    assert first[1].generate_state(4).tolist() == second[1].generate_state(4).tolist()
+    assert first[0].generate_state(4).tolist() != first[1].generate_state(4).tolist()
+
+
+@pytest.fixture(scope='module')
+def pools():
+    ss.install_cleanup_handlers() # Workers share the resource tracker of this process
+    pools = {num_proc: mp.Pool(num_proc, initializer=dc.init_worker) for num_proc in (1, 3)}
+    yield pools
+    for pool in pools.values():
+        pool.close()
+        pool.join()
+
+@pytest.mark.parametrize('scaling, rel_tol', [(20, 0.0), (2000, 0.05), (2.5, 0.0)])
+def test_sampled_same_for_any_num_proc(pools, spinel, spinel_parent, scaling, rel_tol):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'])
+    combinations = engine.composition_data(engine.composition(spinel))['combinations']
+    results = [sample_degeneracy(pools[num_proc], num_proc, engine, spinel, combinations, scaling, rel_tol, sm.config_seeds(3, 1)[0])
+               for num_proc in (1, 3)]
+    assert results[0] == results[1]
+    if (rel_tol == 0):
+        # Engine uses the same random streams, its first config matches the first config of a data list
+        sampled_engine = DegeneracyEngine(spinel_parent, species=['Co'], method='sampled', scaling=scaling, seed=3)
+        assert sampled_engine.degeneracy(spinel) == pytest.approx(results[0])
+
+def test_sampled_different_seeds_differ(pools, spinel, spinel_parent):
+    engine = DegeneracyEngine(spinel_parent, species=['Co'])
+    combinations = engine.composition_data(engine.composition(spinel))['combinations']
+    results = [sample_degeneracy(pools[1], 1, engine, spinel, combinations, 5, 0.0, seed_seq) for seed_seq in sm.config_seeds(0, 2)]
+    assert results[0] != results[1]
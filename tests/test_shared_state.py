@@ -0,0 +1,37 @@
+import multiprocessing as mp
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+import shared_state as ss
+
+
+def read_total(handle):
+    """Sum of the shared arrays, as seen by a worker process"""
+    arrays = ss.attach(handle)
+    return float(arrays['images'].sum()) + float(arrays['bounds'].sum())
+
+def test_shared_arrays_round_trip():
+    arrays = {'images': np.arange(24, dtype=np.uint8).reshape(2, 12), 'bounds': np.array([0, 3, 12])}
+    with ss.SharedArrays(arrays) as shared:
+        attached = ss.attach(shared.handle)
+        for key, value in arrays.items():
+            assert np.array_equal(attached[key], value)
+            assert attached[key].dtype == value.dtype
+        with pytest.raises(ValueError):
+            attached['images'][0, 0] = 1 # Views are read-only
+        ss._detach(shared.handle[0])
+
+def test_workers_read_shared_arrays():
+    ss.install_cleanup_handlers()
+    arrays = {'images': np.ones((3, 5), dtype=np.uint8), 'bounds': np.array([0, 5])}
+    with ss.SharedArrays(arrays) as shared:
+        with mp.Pool(2) as pool:
+            assert pool.map(read_total, [shared.handle]*4) == [20.0]*4
+
+def test_release_removes_block():
+    shared = ss.SharedArrays({'numbers': np.arange(10)})
+    name = shared.handle[0]
+    shared.release()
+    shared.release() # Safe to call more than once
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
@@ -1,14 +1,11 @@
 # Methods for creating plots to visualise atomic arrangements 
 
-import matplotlib.pyplot as plt
-import ase
-import ase.io
-from ase.visualize.plot import plot_atoms
-from ase import Atoms
+import os
+import time
+import argparse
+import multiprocessing as mp
 import numpy as np
-from mpl_toolkits import mplot3d
-from IPython.core.pylabtools import figsize
-figsize(5, 5)
+# matplotlib (and ase's plotting tools) are imported inside each function, as importing them is slow and they are not needed by the rest of the workflow
 
 
 def plot_cell_ase(cell, title):
@@ -22,7 +19,9 @@ def plot_cell_ase(cell, title):
     Returns:
         Produces figure of plot, originally used in development notebook with '%matplotlib inline'
     """
-    fig, ax = plt.subplots()
+    import matplotlib.pyplot as plt
+    from ase.visualize.plot import plot_atoms
+    fig, ax = plt.subplots(figsize=(5, 5))
     plt.title(title)
     plot_atoms(cell, ax, radii=0.3, rotation=('0x,0y,0z'))
       
@@ -38,8 +37,9 @@ def plot_cell_custom_3D(ase_cell, title):
     Returns:
         Produces figure of plot, originally used in development notebook with '%matplotlib inline'
     """
-    figsize(5, 5)
-    fig = plt.figure()
+    import matplotlib.pyplot as plt
+    from mpl_toolkits import mplot3d # Registers the '3d' projection with older versions of matplotlib
+    fig = plt.figure(figsize=(5, 5))
     ax = fig.add_subplot(111, projection='3d')
     u = np.linspace(0, 2 * np.pi, 100)
     v = np.linspace(0, np.pi, 100)
@@ -80,4 +80,113 @@ def plot_cell_custom_3D(ase_cell, title):
     ax.set_zlabel('z')
     plt.title(title)
     plt.tight_layout()
-    plt.show(block=False)
\ No newline at end of file
+    plt.show(block=False)
+
+### Fast batch rendering (off-screen, for many configs):
+
+def render_cfg_png(ase_cell, png_file, title=None, sublattices=None, alloy_species=('Co', 'Mn'), size=4, dpi=100):
+    """Renders a 3D plot of a structure straight to a PNG file, without needing an interactive backend
+    Atoms are drawn as one scatter per sublattice (each with its own marker, other sites as small squares), coloured by species
+
+    Args:
+        ase_cell (ase Atoms object): Structure to render
+        png_file (str): Location of PNG file to write
+        title (str): Title of the plot (default is the chemical formula)
+        sublattices (dictionary): Label: indices of the sites of each sublattice, when None the sublattices occupied by
+            alloy_species are found with misc_tools.detect_sublattices (e.g. td and oh sites of a spinel)
+        alloy_species (list): Species that substitute for each other, used when sublattices is None
+        size (float): Width and height of the figure in inches
+        dpi (int): Resolution of the PNG file
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+    from ase.data import chemical_symbols
+    from ase.data.colors import jmol_colors
+
+    positions = ase_cell.get_positions()
+    numbers = ase_cell.get_atomic_numbers()
+    lattice = np.array(ase_cell.get_cell())
+    if sublattices is None:
+        import misc_tools as mt
+        parent_cfg = mt.de_colour(ase_cell, alloy_species[0], alloy_species)
+        sublattices = mt.detect_sublattices(parent_cfg, 1e-3, [alloy_species[0]])
+    markers = ['^', 'o', 'D', 'v', 'p', 'h']
+    site_type = np.full(len(numbers), -1, dtype=int) # -1: other, i: sublattice i
+    for (i, sites) in enumerate(sublattices.values()):
+        site_type[np.asarray(sites, dtype=int)] = i
+    kinds = [(i, markers[i % len(markers)], 60) for i in range(len(sublattices))] + [(-1, 's', 12)]
+
+    fig = Figure(figsize=(size, size))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    # Cell edges drawn as a single line, with NaN separating the 12 edges
+    corners = np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)], dtype=float).dot(lattice)
+    edges = [(0, 1), (0, 2), (0, 4), (1, 3), (1, 5), (2, 3), (2, 6), (3, 7), (4, 5), (4, 6), (5, 7), (6, 7)]
+    edge_points = np.concatenate([np.vstack((corners[a], corners[b], np.full(3, np.nan))) for (a, b) in edges])
+    ax.plot(edge_points[:, 0], edge_points[:, 1], edge_points[:, 2], color='0.6', linewidth=0.5)
+    for (kind, marker, area) in kinds:
+        selected = (site_type == kind)
+        if np.any(selected):
+            ax.scatter(positions[selected, 0], positions[selected, 1], positions[selected, 2], c=jmol_colors[numbers[selected]],
+                       marker=marker, s=area, edgecolors='k', linewidths=0.3, depthshade=False)
+    handles = [Patch(facecolor=jmol_colors[number], edgecolor='k', label=chemical_symbols[number]) for number in np.unique(numbers)]
+    handles += [Line2D([], [], linestyle='', marker=marker, markerfacecolor='w', markeredgecolor='k', label=label)
+                for (marker, label) in zip([marker for (kind, marker, area) in kinds], sublattices)]
+    ax.legend(handles=handles, loc='upper left', fontsize='x-small', frameon=False)
+    ax.set_axis_off()
+    ax.set_title(ase_cell.get_chemical_formula() if title is None else title, fontsize='small')
+    fig.savefig(png_file, dpi=dpi)
+
+def _render_loc(args):
+    """Reads 'POSCAR_orig' from a directory of the data list and renders it, for use with 'pool.imap_unordered'
+    Returns the location of the PNG file, or None if the config could not be read or rendered
+    """
+    cfg_inpt, png_file, kwargs = args
+    import ase.io
+    try:
+        ase_cell = ase.io.read(os.path.join(cfg_inpt, 'POSCAR_orig'), format='vasp')
+        render_cfg_png(ase_cell, png_file, title=os.path.basename(cfg_inpt)+': '+ase_cell.get_chemical_formula(), **kwargs)
+    except Exception:
+        print('Error in processing config from: '+str(cfg_inpt))
+        return None
+    return png_file
+
+def render_data_list(data_locs, out_dir, num_proc=1, **kwargs):
+    """Renders the config in each directory of a data list to a PNG file, in parallel worker processes
+
+    Args:
+        data_locs (str): File where each line is location of an original (unrelaxed) POSCAR ('POSCAR_orig') to be rendered
+        out_dir (str): Directory to write PNG files to, named after the last two parts of each location (created if it does not exist)
+        num_proc (int): Number of worker processes
+        **kwargs: Passed on to render_cfg_png (e.g. sublattices, alloy_species, size, dpi)
+
+    Returns:
+        list: Locations of the PNG files that were written (configs that could not be rendered are left out)
+    """
+    with open(data_locs) as f:
+        all_set_locs = [loc.strip() for loc in f if loc.strip()]
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = []
+    for cfg_inpt in all_set_locs:
+        name = '_'.join(os.path.normpath(cfg_inpt).split(os.sep)[-2:])
+        tasks.append((cfg_inpt, os.path.join(out_dir, name+'.png'), kwargs))
+    png_files = []
+    with mp.Pool(num_proc) as pool:
+        for png_file in pool.imap_unordered(_render_loc, tasks):
+            if png_file is not None:
+                png_files.append(png_file)
+    return png_files
+
+
+if __name__=='__main__':
+
+    parser = argparse.ArgumentParser(description='Render the config in each directory of a data list to PNG files')
+    parser.add_argument('data_locs', help='File where each line is location of a POSCAR_orig to render')
+    parser.add_argument('out_dir', help='Directory to write PNG files to')
+    parser.add_argument('--num-proc', type=int, default=1, help='Number of worker processes')
+    args = parser.parse_args()
+    t1 = time.time()
+    png_files = render_data_list(args.data_locs, args.out_dir, args.num_proc)
+    print('Rendered {0} configs in {1} secs'.format(len(png_files), time.time()-t1))